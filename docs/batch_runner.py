@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Sharded Batch Runner
+Spreads a batch manifest across worker processes (and optionally several hosts)
+through a shared SQLite work queue with leasing and crash recovery
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+
+# Longest an idle worker sleeps between claims while another worker holds leases
+IDLE_POLL_SECONDS = 5.0
+
+
+def read_manifest(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream asset specifications from a manifest file
+
+    Args:
+        path: JSON Lines file (one spec per line) or a JSON array file
+
+    Yields:
+        Asset specification dictionaries
+    """
+    with open(path) as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first == "[":
+            f.seek(0)
+            yield from json.load(f)
+            return
+
+        f.seek(0)
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of batch items
+
+    Workers claim small groups of items under a time-limited lease and renew
+    it while they work. Idle workers keep claiming until no item is pending
+    or leased, so fast workers naturally take over items a slow worker has
+    not reached, and leases left behind by a crashed worker expire and are
+    picked up by the others. Several hosts can share one queue file on a
+    common directory as long as the filesystem provides working POSIX locks;
+    the file uses SQLite's rollback journal, since WAL mode needs shared
+    memory on a single host.
+    """
+
+    def __init__(self, db_path: str, lease_seconds: float = 600, max_attempts: int = 3):
+        """
+        Open (and create if needed) a work queue
+
+        Args:
+            db_path: SQLite database file
+            lease_seconds: How long a claim stays valid without renewal
+            max_attempts: Claims per item before it is marked failed
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Not WAL: its shared-memory index does not work across hosts or network filesystems
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                spec TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                manifest_index INTEGER
+            )
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        if "manifest_index" not in columns:  # Queue files created before the column existed
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN manifest_index INTEGER")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('run_id', ?)", (uuid.uuid4().hex,))
+        # Identifies this queue in idempotency keys, so equal task ids in other runs never collide
+        self.run_id = self.conn.execute("SELECT value FROM meta WHERE key = 'run_id'").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def load(
+        self,
+        specs: Iterable[Dict[str, Any]],
+        source: str = "manifest",
+        indices: Optional[Iterable[int]] = None
+    ) -> int:
+        """
+        Enqueue specifications once per source
+
+        Re-running with the same source resumes the existing queue instead of
+        enqueuing the manifest again.
+
+        Args:
+            specs: Asset specifications, in the order they should be claimed
+            source: Identifier recorded so a manifest is only loaded once
+            indices: Manifest position of each spec, when the specs are a
+                reordered subset (defaults to enqueue order)
+
+        Returns:
+            Number of items enqueued by this call
+        """
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                loaded = self.conn.execute(
+                    "SELECT value FROM meta WHERE key = ?", (f"loaded:{source}",)
+                ).fetchone()
+                if loaded:
+                    self.conn.execute("COMMIT")
+                    return 0
+
+                before = self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+                # Without explicit indices, results are exported by task id (enqueue order)
+                positions = indices if indices is not None else itertools.repeat(None)
+                self.conn.executemany(
+                    "INSERT INTO tasks (spec, manifest_index) VALUES (?, ?)",
+                    ((json.dumps(spec), index) for spec, index in zip(specs, positions))
+                )
+                after = self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+                self.conn.execute(
+                    "INSERT INTO meta (key, value) VALUES (?, ?)", (f"loaded:{source}", str(time.time()))
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        return after - before
+
+    def claim(self, owner: str, limit: int = 1) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Lease up to `limit` pending or expired items
+
+        Args:
+            owner: Worker identifier
+            limit: Maximum items to claim
+
+        Returns:
+            List of (task id, specification)
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Items whose lease expired too often are given up on
+                self.conn.execute(
+                    """UPDATE tasks SET status = 'failed', owner = NULL,
+                       result = json_object('success', json('false'), 'error', 'lease expired too many times')
+                       WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                    (now, self.max_attempts)
+                )
+                rows = self.conn.execute(
+                    """SELECT id, spec FROM tasks
+                       WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                       ORDER BY id LIMIT ?""",
+                    (now, limit)
+                ).fetchall()
+                self.conn.executemany(
+                    """UPDATE tasks SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1
+                       WHERE id = ?""",
+                    [(owner, now + self.lease_seconds, task_id) for task_id, _ in rows]
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        return [(task_id, json.loads(spec)) for task_id, spec in rows]
+
+    def renew(self, owner: str) -> None:
+        """Extend every lease held by a worker"""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE owner = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, owner)
+            )
+
+    def complete(self, task_id: int, owner: str, result: Dict[str, Any]) -> bool:
+        """
+        Record an item's result
+
+        Args:
+            task_id: Claimed task id
+            owner: Worker identifier that claimed it
+            result: Result dictionary
+
+        Returns:
+            False if the lease had been taken over by another worker
+        """
+        status = "done" if result.get("success") else "failed"
+        with self._lock:
+            cursor = self.conn.execute(
+                """UPDATE tasks SET status = ?, result = ?, owner = NULL, lease_expires = NULL
+                   WHERE id = ? AND owner = ? AND status = 'leased'""",
+                (status, json.dumps(result), task_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def next_expiry(self) -> Optional[float]:
+        """Earliest lease expiry (epoch seconds) among leased items, or None if nothing is leased"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT MIN(lease_expires) FROM tasks WHERE status = 'leased'"
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Count items by status"""
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def export_results(self, output_path: str) -> int:
+        """
+        Write all finished results, in manifest order, as JSON Lines
+
+        Args:
+            output_path: Destination file
+
+        Returns:
+            Number of results written
+        """
+        count = 0
+        with self._lock, open(output_path, "w") as f:
+            for index, result in self.conn.execute(
+                """SELECT COALESCE(manifest_index, id - 1) AS position, result FROM tasks
+                   WHERE result IS NOT NULL ORDER BY position"""
+            ):
+                record = json.loads(result)
+                record["index"] = index
+                f.write(json.dumps(record) + "\n")
+                count += 1
+        return count
+
+
+def plan_manifest(
+    specs: Iterable[Dict[str, Any]],
+    max_workers: int,
+    budget_seconds: Optional[float] = None,
+    budget_cost: Optional[float] = None
+):
+    """
+    Plan a manifest the way run_sharded runs it
+
+    Workers have no result cache and do not share results, so nothing is
+    deduplicated or served from cache: every item counts as its own request.
+
+    Args:
+        specs: Asset specifications
+        max_workers: Concurrent generations across all workers
+        budget_seconds: Wall-clock budget (None for no limit)
+        budget_cost: Spend budget in USD (None for no limit)
+
+    Returns:
+        planner.BatchPlan
+    """
+    from planner import plan_batch
+
+    return plan_batch(
+        specs,
+        max_workers=max_workers,
+        dedupe=False,
+        budget_seconds=budget_seconds,
+        budget_cost=budget_cost
+    )
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_worker(
+    db_path: str,
+    output_dir: str = "./assets",
+    claim_size: int = 4,
+    threads: int = 2,
+    lease_seconds: float = 600
+) -> int:
+    """
+    Process queue items until none are pending or leased
+
+    Items are leased as generation slots free up and fed into one stream
+    of concurrent generations, so a slow item never holds up the rest of
+    its claim. While other workers hold leases, an idle worker waits for
+    them (up to the earliest expiry, polling every IDLE_POLL_SECONDS) so
+    items left by a crashed worker are still taken over within the run.
+
+    Args:
+        db_path: Shared SQLite queue
+        output_dir: Base directory for saving assets
+        claim_size: Items leased per claim
+        threads: Concurrent generations inside this worker
+        lease_seconds: Lease length; renewed every third of it while working
+
+    Returns:
+        Number of items this worker completed
+    """
+    from claude_integration import ClaudeCreativeAssistant
+    from fal_api import NanobananProClient
+    from idempotency import SubmitJournal
+
+    queue = WorkQueue(db_path, lease_seconds=lease_seconds)
+    # Submits are journaled in the queue file: a task re-claimed after a crash
+    # re-attaches to the generation its previous owner already paid for
+    journal = SubmitJournal(db_path)
+    assistant = ClaudeCreativeAssistant(output_dir=output_dir, client=NanobananProClient(journal=journal))
+    owner = _worker_id()
+    completed = 0
+
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(lease_seconds / 3):
+            queue.renew(owner)
+
+    renewer = threading.Thread(target=heartbeat, daemon=True)
+    renewer.start()
+
+    def claimed_specs(task_ids: List[int]) -> Iterator[Dict[str, Any]]:
+        """Lease items on demand; ends once nothing is claimable right now"""
+        while True:
+            claimed = queue.claim(owner, claim_size)
+            if not claimed:
+                return
+            for task_id, spec in claimed:
+                task_ids.append(task_id)
+                yield dict(spec, idempotency_key=f"{queue.run_id}:{task_id}")
+
+    try:
+        while True:
+            task_ids: List[int] = []
+            # Pulled one spec per free slot, so claims overlap with generations still running
+            for result in assistant.iter_batch_generate(
+                claimed_specs(task_ids), max_workers=threads, lookahead=threads
+            ):
+                task_id = task_ids[result.index]
+                record = result.to_dict()
+                del record["index"]
+                if queue.complete(task_id, owner, record):
+                    completed += 1
+            if task_ids:
+                continue
+
+            expires = queue.next_expiry()
+            if expires is None:
+                break
+            time.sleep(min(max(expires - time.time(), 0.0) + 0.1, IDLE_POLL_SECONDS))
+    finally:
+        stop.set()
+        assistant.close()
+        queue.close()
+        journal.close()
+
+    return completed
+
+
+def _worker_entry(db_path: str, output_dir: str, claim_size: int, threads: int, lease_seconds: float):
+    run_worker(db_path, output_dir, claim_size, threads, lease_seconds)
+
+
+def run_sharded(
+    manifest_path: Optional[str],
+    db_path: str,
+    output_dir: str = "./assets",
+    workers: Optional[int] = None,
+    threads: int = 2,
+    claim_size: int = 4,
+    lease_seconds: float = 600,
+    results_path: Optional[str] = None,
+    budget_seconds: Optional[float] = None,
+    budget_cost: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run a manifest across worker processes on this host
+
+    Other hosts can join the same run by calling run_sharded(None, db_path, ...)
+    against the shared queue file.
+
+    Args:
+        manifest_path: Manifest to enqueue (None to only work an existing queue)
+        db_path: SQLite queue file
+        output_dir: Base directory for saving assets
+        workers: Worker processes (defaults to the CPU count)
+        threads: Concurrent generations per worker
+        claim_size: Items leased per claim
+        lease_seconds: Lease length before an item is considered abandoned
+        results_path: Where to write aggregated JSON Lines results
+        budget_seconds: Wall-clock budget for the manifest (e.g. a nightly
+            window); only the items that fit are enqueued, cheapest first
+        budget_cost: Spend budget in USD, applied the same way
+
+    Returns:
+        Dictionary with queue counts, elapsed seconds, the results path and
+        the items deferred by the budget
+    """
+    started = time.time()
+    workers = workers or os.cpu_count() or 1
+
+    queue = WorkQueue(db_path, lease_seconds=lease_seconds)
+    enqueued = 0
+    deferred = []
+    indices = None
+    if manifest_path:
+        specs = read_manifest(manifest_path)
+        if budget_seconds is not None or budget_cost is not None:
+            plan = plan_manifest(specs, workers * threads, budget_seconds, budget_cost)
+            specs = [item.asset for item in plan.requests]
+            indices = [item.index for item in plan.requests]
+            deferred = plan.summary()["deferred"]
+        enqueued = queue.load(specs, source=str(Path(manifest_path).resolve()), indices=indices)
+
+    processes = [
+        multiprocessing.Process(
+            target=_worker_entry,
+            args=(db_path, output_dir, claim_size, threads, lease_seconds),
+            name=f"batch-worker-{i}"
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    summary = {
+        "enqueued": enqueued,
+        "counts": queue.stats(),
+        "elapsed_seconds": round(time.time() - started, 2),
+        "results_path": None,
+        "deferred": deferred
+    }
+    if results_path:
+        queue.export_results(results_path)
+        summary["results_path"] = results_path
+    queue.close()
+
+    return summary
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(
+        description="Run a batch manifest across worker processes with a shared SQLite queue",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Run a manifest on all local cores
+  python batch_runner.py --manifest campaign.jsonl --db /shared/campaign.sqlite --results results.jsonl
+
+  # Join the same run from another host
+  python batch_runner.py --db /shared/campaign.sqlite --workers 16
+
+  # Estimate requests and wall-clock time without submitting anything
+  python batch_runner.py --manifest campaign.jsonl --db /shared/campaign.sqlite --plan
+
+  # Fit a run into a 6-hour window and $200, cheapest assets first
+  python batch_runner.py --manifest campaign.jsonl --db /shared/campaign.sqlite --budget-hours 6 --budget-cost 200
+        """
+    )
+    parser.add_argument("--manifest", help="JSON Lines or JSON array of asset specifications")
+    parser.add_argument("--db", required=True, help="SQLite work queue file (shared between hosts)")
+    parser.add_argument("--output-dir", default="./assets", help="Output directory (default: ./assets)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--threads", type=int, default=2, help="Concurrent generations per worker (default: 2)")
+    parser.add_argument("--claim-size", type=int, default=4, help="Items leased per claim (default: 4)")
+    parser.add_argument("--lease-seconds", type=float, default=600, help="Lease length in seconds (default: 600)")
+    parser.add_argument("--results", help="Write aggregated results to this JSON Lines file")
+    parser.add_argument("--plan", action="store_true",
+                        help="Print a dry-run plan (requests, time and spend estimates, deferred items) and exit")
+    parser.add_argument("--budget-hours", type=float,
+                        help="Only run what fits in this many hours, cheapest first; the rest is reported as deferred")
+    parser.add_argument("--budget-cost", type=float,
+                        help="Only run what fits in this spend (USD), cheapest first")
+    args = parser.parse_args()
+    budget_seconds = args.budget_hours * 3600 if args.budget_hours is not None else None
+    
+    if args.plan:
+        if not args.manifest:
+            parser.error("--plan requires --manifest")
+        plan = plan_manifest(
+            read_manifest(args.manifest),
+            (args.workers or os.cpu_count() or 1) * args.threads,
+            budget_seconds,
+            args.budget_cost
+        )
+        print(json.dumps(plan.summary(), indent=2))
+        return 0
+
+    summary = run_sharded(
+        manifest_path=args.manifest,
+        db_path=args.db,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        threads=args.threads,
+        claim_size=args.claim_size,
+        lease_seconds=args.lease_seconds,
+        results_path=args.results,
+        budget_seconds=budget_seconds,
+        budget_cost=args.budget_cost
+    )
+    print(json.dumps(summary, indent=2))
+    counts = summary["counts"]
+    # Items still pending or leased mean the run did not finish (e.g. every worker died)
+    return 0 if counts["failed"] == 0 and counts["pending"] == 0 and counts["leased"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
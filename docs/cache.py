@@ -0,0 +1,230 @@
+"""
+Result Cache Module
+Remembers successful generations so repeated requests, or prompts that are
+near-duplicates of earlier ones, can reuse the saved assets instead of
+calling the API again
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+
+class ResultCache:
+    """
+    Exact-match cache of saved assets, stored as a JSON Lines index
+
+    Each line records one successful generation: its fingerprint (see
+    planner.request_key) and the saved image locations. Entries whose local
+    files have since been deleted are treated as misses. The index is
+    append-only, so several processes can add to the same file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) a cache index
+
+        Args:
+            path: JSON Lines index file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write from a crashed process
+                    self._entries[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a fingerprint
+
+        Args:
+            key: Request fingerprint
+
+        Returns:
+            The cached entry, or None if unknown or its files are gone
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or not _files_exist(entry["images"]):
+            return None
+        return entry
+
+    def put(self, key: str, record: Dict[str, Any]) -> None:
+        """
+        Record a successful generation
+
+        Args:
+            key: Request fingerprint
+            record: Result fields to keep (images, request_id, prompt_used, ...)
+        """
+        entry = dict(record, key=key, created=time.time())
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self._entries[key] = entry
+            with open(self.path, "a") as f:
+                f.write(line)
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_STOPWORDS = frozenset({"a", "an", "the", "and", "or", "with", "of", "in", "on", "for", "to", "at", "by"})
+
+
+def _shingles(text: str) -> set:
+    """Order-insensitive word set of a prompt, ignoring case, punctuation and filler words"""
+    words = re.sub(r"[^a-z0-9]+", " ", text.lower()).split()
+    return {word for word in words if word not in _STOPWORDS} or set(words)
+
+
+def _files_exist(images: List[str]) -> bool:
+    return all("://" in location or os.path.exists(location) for location in images)
+
+
+class SimilarPromptCache:
+    """
+    Near-duplicate prompt cache using MinHash over word sets
+
+    Prompts that differ only by whitespace, punctuation, word order or a
+    swapped word map to similar MinHash signatures. Locality-sensitive
+    hashing over signature bands finds candidates without scanning every
+    entry; a candidate is reused when its estimated Jaccard similarity is at
+    least the threshold. Matches are only made within one scope (asset kind,
+    name and generation settings), so two products sharing a prompt template
+    never reuse each other's images. Fully offline; the index is stored as
+    JSON Lines.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16
+    ):
+        """
+        Open (and create if needed) a similarity index
+
+        Args:
+            path: JSON Lines index file
+            threshold: Minimum estimated Jaccard similarity (0-1) for a hit
+            num_perm: MinHash signature length
+            bands: LSH bands; num_perm must be divisible by it
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be between 0 and 1")
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self._rows = num_perm // bands
+
+        # Fixed seed: signatures stored in the index must stay comparable across runs
+        rng = random.Random(0x5EED)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+        self._entries: List[Dict[str, Any]] = []
+        self._buckets: Dict[Tuple, List[int]] = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write from a crashed process
+                    if len(entry.get("signature", ())) == num_perm:
+                        self._index(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, prompt: str) -> List[int]:
+        """MinHash signature of a prompt"""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big")
+            for word in _shingles(prompt)
+        ]
+        if not hashes:
+            return [0] * self.num_perm
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _bands(self, scope: str, signature: List[int]):
+        for band in range(self.bands):
+            start = band * self._rows
+            yield (scope, band, tuple(signature[start:start + self._rows]))
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        position = len(self._entries)
+        self._entries.append(entry)
+        for bucket in self._bands(entry["scope"], entry["signature"]):
+            self._buckets.setdefault(bucket, []).append(position)
+
+    def lookup(self, scope: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the most similar earlier prompt in a scope
+
+        Args:
+            scope: Generation settings the match must share exactly
+            prompt: Prompt about to be generated
+
+        Returns:
+            The cached entry plus a "similarity" estimate, or None
+        """
+        signature = self.signature(prompt)
+        with self._lock:
+            candidates = set()
+            for bucket in self._bands(scope, signature):
+                candidates.update(self._buckets.get(bucket, ()))
+            scored = sorted(
+                (
+                    (sum(x == y for x, y in zip(signature, self._entries[i]["signature"])) / self.num_perm, i)
+                    for i in candidates
+                ),
+                reverse=True
+            )
+            matches = [(score, self._entries[i]) for score, i in scored if score >= self.threshold]
+
+        for score, entry in matches:
+            if _files_exist(entry["images"]):
+                return dict(entry, similarity=round(score, 3))
+        return None
+
+    def add(self, scope: str, prompt: str, record: Dict[str, Any]) -> None:
+        """
+        Remember a successful generation
+
+        Args:
+            scope: Generation settings the prompt was generated with
+            prompt: Prompt that was generated
+            record: Result fields to keep (images, request_id, ...)
+        """
+        entry = dict(record, scope=scope, prompt=prompt, signature=self.signature(prompt), created=time.time())
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self._index(entry)
+            with open(self.path, "a") as f:
+                f.write(line)
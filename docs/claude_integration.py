@@ -5,18 +5,174 @@ Provides functions for Claude Code to call for asset generation with nanobanana
 
 import os
 import json
+import random
+import uuid
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Optional, List, Dict, Any
-from fal_api import CreativeAssetGenerator
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Union
+from fal_api import CreativeAssetGenerator, NanobananProClient
+from storage import AssetStorage, ContentAddressedStorage, deferred_flush
+from renditions import RenditionPipeline
+from perceptual import PerceptualIndex
+from watcher import AssetIndex
+from concurrency import AdaptiveLimiter, MemoryBudget
+from hedging import HedgePolicy
+from deadline import Deadline, as_deadline
+from results import AssetResult
+from cache import ResultCache, SimilarPromptCache
+from planner import BatchPlan, normalize_spec, request_key, plan_batch
+import idempotency
+import scenes
+import tracing
 
 
 class ClaudeCreativeAssistant:
     """Assistant class for Claude Code to generate creative assets with nanobanana pro"""
     
-    def __init__(self, output_dir: str = "./assets"):
-        """Initialize the assistant"""
-        self.generator = CreativeAssetGenerator(output_dir=output_dir)
+    def __init__(
+        self,
+        output_dir: str = "./assets",
+        deduplicate: bool = False,
+        storage: Optional[AssetStorage] = None,
+        renditions: bool = False,
+        limiter: Optional[AdaptiveLimiter] = None,
+        hedge: Optional[HedgePolicy] = None,
+        client: Optional[NanobananProClient] = None,
+        cache: Union[bool, ResultCache] = False,
+        similar_prompts: Union[bool, SimilarPromptCache] = False,
+        similarity_threshold: float = 0.85,
+        near_duplicates: Optional[str] = None,
+        live_summary: bool = False,
+        memory_budget: Optional[MemoryBudget] = None
+    ):
+        """
+        Initialize the assistant
+        
+        Args:
+            output_dir: Base directory for saving assets
+            deduplicate: Store identical image bytes once under <output_dir>/.store
+                and link them into the category folders
+            storage: Explicit storage backend (e.g. S3Storage); overrides deduplicate
+            renditions: Produce thumbnails, web copies and platform crops for
+                product photos and social posts (requires Pillow)
+            limiter: Adaptive concurrency limiter shared by all generation
+                submits; iter_batch_generate then sizes its pool to limiter.max_limit
+                (taken from the client when one is given)
+            hedge: Hedging policy for status polls and image downloads
+            client: Shared API client (connection pool, limiter and hedge);
+                limiter and hedge are ignored when given
+            cache: Reuse saved assets for batch items whose request exactly
+                matches an earlier success (True keeps the index in
+                <output_dir>/.cache/results.jsonl, or pass a ResultCache)
+            similar_prompts: Reuse saved assets when a new prompt is a
+                near-duplicate of an earlier one for the same asset and
+                settings (True keeps the index in <output_dir>/.cache/prompts.jsonl,
+                or pass a SimilarPromptCache)
+            similarity_threshold: Minimum prompt similarity (0-1) for reuse
+                when similar_prompts is True
+            near_duplicates: "flag" or "skip" to perceptual-hash product photos
+                and social posts after download against a persistent index in
+                <output_dir>/.cache/phash.jsonl (requires NumPy and Pillow)
+            live_summary: Keep asset counts and byte totals in memory, updated
+                by a filesystem watcher and by this assistant's own writes, so
+                get_asset_summary() does not walk output_dir
+            memory_budget: Cap on image bytes buffered in memory across all
+                concurrent downloads (ignored when client is given; pass it
+                to the client instead)
+        """
+        if storage is None and deduplicate:
+            storage = ContentAddressedStorage(output_dir)
+        self.generator = CreativeAssetGenerator(
+            output_dir=output_dir,
+            storage=storage,
+            renditions=RenditionPipeline() if renditions else None,
+            limiter=limiter,
+            hedge=hedge,
+            client=client,
+            memory_budget=memory_budget,
+            near_duplicates=(
+                PerceptualIndex(Path(output_dir) / ".cache" / "phash.jsonl", mode=near_duplicates)
+                if near_duplicates else None
+            )
+        )
         self.output_dir = Path(output_dir)
+        if cache is True:
+            cache = ResultCache(self.output_dir / ".cache" / "results.jsonl")
+        elif cache is False:
+            cache = None
+        self.cache = cache
+        if similar_prompts is True:
+            similar_prompts = SimilarPromptCache(
+                self.output_dir / ".cache" / "prompts.jsonl", threshold=similarity_threshold
+            )
+        elif similar_prompts is False:
+            similar_prompts = None
+        self.similar_prompts = similar_prompts
+        self.asset_index = None
+        if live_summary:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self.asset_index = AssetIndex(self.output_dir)
+            self.generator.storage.add_listener(self.asset_index.notify_write)
+    
+    def close(self) -> None:
+        """Stop the rendition worker processes and the live summary watcher"""
+        if self.generator.renditions is not None:
+            self.generator.renditions.close()
+        if self.asset_index is not None:
+            self.asset_index.close()
+    
+    def __enter__(self) -> "ClaudeCreativeAssistant":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
+    
+    def _generate_or_recall(
+        self,
+        scope: tuple,
+        prompt: str,
+        generate: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Return saved assets for a near-duplicate prompt, or generate and remember
+        
+        Args:
+            scope: Asset identity and settings a reused result must match exactly
+            prompt: Prompt about to be generated
+            generate: Performs the generation and returns the generator result
+        
+        Returns:
+            Generator-style result ("saved_paths", "request_id", "saved_bytes");
+            reused results also carry "cached", "similar_prompt" and "similarity"
+        """
+        if self.similar_prompts is None:
+            return generate()
+        
+        key = json.dumps(scope)
+        match = self.similar_prompts.lookup(key, prompt)
+        if match is not None:
+            with tracing.span("assistant.prompt_cache_hit", similarity=match["similarity"]):
+                return {
+                    "saved_paths": match["images"],
+                    "request_id": match.get("request_id"),
+                    "saved_bytes": match.get("bytes_written", 0),
+                    "cached": True,
+                    "similar_prompt": match["prompt"],
+                    "similarity": match["similarity"]
+                }
+        
+        result = generate()
+        if "saved_paths" in result:
+            self.similar_prompts.add(key, prompt, {
+                "images": result["saved_paths"],
+                "request_id": result.get("request_id"),
+                "bytes_written": result.get("saved_bytes", 0)
+            })
+        return result
     
     def generate_product_photo(
         self,
@@ -27,7 +183,8 @@ class ClaudeCreativeAssistant:
         background: str = "white background",
         num_variations: int = 1,
         resolution: str = "2K",
-        aspect_ratio: str = "1:1"
+        aspect_ratio: str = "1:1",
+        deadline: Union[None, float, Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate product photography
@@ -41,6 +198,8 @@ class ClaudeCreativeAssistant:
             num_variations: Number of variations to generate
             resolution: Image resolution (1K, 2K, 4K)
             aspect_ratio: Image aspect ratio
+            deadline: Seconds from now or a Deadline; generation and downloads
+                that cannot finish in time are cancelled early
         
         Returns:
             Dictionary with generated image paths and metadata
@@ -48,22 +207,36 @@ class ClaudeCreativeAssistant:
         
         prompt = f"{description}, {style}, {lighting}, {background}, sharp focus, 4K, professional quality"
         
-        result = self.generator.generate_product_photo(
-            product_name=product_name,
-            prompt=prompt,
-            num_images=num_variations,
-            resolution=resolution,
-            aspect_ratio=aspect_ratio,
-            save=True
+        result = self._generate_or_recall(
+            ("product", product_name, num_variations, resolution, aspect_ratio),
+            prompt,
+            lambda: self.generator.generate_product_photo(
+                product_name=product_name,
+                prompt=prompt,
+                num_images=num_variations,
+                resolution=resolution,
+                aspect_ratio=aspect_ratio,
+                save=True,
+                deadline=as_deadline(deadline)
+            )
         )
         
-        return {
+        output = {
             "success": "saved_paths" in result,
             "images": result.get("saved_paths", []),
+            "request_id": result.get("request_id"),
+            "bytes_written": result.get("saved_bytes", 0),
+            "cached": result.get("cached", False),
             "prompt_used": prompt,
             "resolution": resolution,
             "aspect_ratio": aspect_ratio
         }
+        if "renditions" in result:
+            output["renditions"] = result["renditions"]
+        if result.get("near_duplicates"):
+            output["near_duplicates"] = result["near_duplicates"]
+        
+        return output
     
     def generate_social_post(
         self,
@@ -74,7 +247,8 @@ class ClaudeCreativeAssistant:
         mood: str = "professional",
         num_variations: int = 1,
         resolution: str = "2K",
-        aspect_ratio: str = "1:1"
+        aspect_ratio: str = "1:1",
+        deadline: Union[None, float, Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate social media post graphics
@@ -88,6 +262,8 @@ class ClaudeCreativeAssistant:
             num_variations: Number of variations
             resolution: Image resolution
             aspect_ratio: Image aspect ratio
+            deadline: Seconds from now or a Deadline; generation and downloads
+                that cannot finish in time are cancelled early
         
         Returns:
             Dictionary with generated image paths and metadata
@@ -95,24 +271,38 @@ class ClaudeCreativeAssistant:
         
         prompt = f"{description}, {style}, {mood}, eye-catching, professional quality, 4K, trending on {platform}"
         
-        result = self.generator.generate_social_graphic(
-            platform=platform,
-            topic=topic,
-            prompt=prompt,
-            num_images=num_variations,
-            resolution=resolution,
-            aspect_ratio=aspect_ratio,
-            save=True
+        result = self._generate_or_recall(
+            ("social", platform, topic, num_variations, resolution, aspect_ratio),
+            prompt,
+            lambda: self.generator.generate_social_graphic(
+                platform=platform,
+                topic=topic,
+                prompt=prompt,
+                num_images=num_variations,
+                resolution=resolution,
+                aspect_ratio=aspect_ratio,
+                save=True,
+                deadline=as_deadline(deadline)
+            )
         )
         
-        return {
+        output = {
             "success": "saved_paths" in result,
             "images": result.get("saved_paths", []),
+            "request_id": result.get("request_id"),
+            "bytes_written": result.get("saved_bytes", 0),
+            "cached": result.get("cached", False),
             "prompt_used": prompt,
             "platform": platform,
             "resolution": resolution,
             "aspect_ratio": aspect_ratio
         }
+        if "renditions" in result:
+            output["renditions"] = result["renditions"]
+        if result.get("near_duplicates"):
+            output["near_duplicates"] = result["near_duplicates"]
+        
+        return output
     
     def generate_brand_element(
         self,
@@ -123,7 +313,8 @@ class ClaudeCreativeAssistant:
         colors: str = "professional colors",
         num_variations: int = 1,
         resolution: str = "2K",
-        aspect_ratio: str = "1:1"
+        aspect_ratio: str = "1:1",
+        deadline: Union[None, float, Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate brand elements (logo, icons, patterns)
@@ -137,6 +328,8 @@ class ClaudeCreativeAssistant:
             num_variations: Number of variations
             resolution: Image resolution
             aspect_ratio: Image aspect ratio
+            deadline: Seconds from now or a Deadline; generation and downloads
+                that cannot finish in time are cancelled early
         
         Returns:
             Dictionary with generated image paths and metadata
@@ -144,19 +337,27 @@ class ClaudeCreativeAssistant:
         
         prompt = f"{description}, {style}, {colors}, professional quality, 4K, scalable design"
         
-        result = self.generator.generate_brand_asset(
-            asset_type=element_type,
-            brand_name=brand_name,
-            prompt=prompt,
-            num_images=num_variations,
-            resolution=resolution,
-            aspect_ratio=aspect_ratio,
-            save=True
+        result = self._generate_or_recall(
+            ("brand", brand_name, element_type, num_variations, resolution, aspect_ratio),
+            prompt,
+            lambda: self.generator.generate_brand_asset(
+                asset_type=element_type,
+                brand_name=brand_name,
+                prompt=prompt,
+                num_images=num_variations,
+                resolution=resolution,
+                aspect_ratio=aspect_ratio,
+                save=True,
+                deadline=as_deadline(deadline)
+            )
         )
         
         return {
             "success": "saved_paths" in result,
             "images": result.get("saved_paths", []),
+            "request_id": result.get("request_id"),
+            "bytes_written": result.get("saved_bytes", 0),
+            "cached": result.get("cached", False),
             "prompt_used": prompt,
             "element_type": element_type,
             "resolution": resolution,
@@ -172,7 +373,9 @@ class ClaudeCreativeAssistant:
         resolution: str = "2K",
         aspect_ratio: str = "1:1",
         output_format: str = "png",
-        enable_web_search: bool = False
+        enable_web_search: bool = False,
+        seed: Optional[int] = None,
+        deadline: Union[None, float, Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate custom asset with full control
@@ -186,26 +389,38 @@ class ClaudeCreativeAssistant:
             aspect_ratio: Image aspect ratio
             output_format: Output format (png, jpeg, webp)
             enable_web_search: Enable Google Search integration
+            seed: Random seed for reproducible generations
+            deadline: Seconds from now or a Deadline; generation and downloads
+                that cannot finish in time are cancelled early
         
         Returns:
             Dictionary with generated image paths and metadata
         """
         
-        result = self.generator.generate_custom(
-            asset_category=category,
-            asset_name=name,
-            prompt=prompt,
-            num_images=num_variations,
-            resolution=resolution,
-            aspect_ratio=aspect_ratio,
-            output_format=output_format,
-            enable_web_search=enable_web_search,
-            save=True
+        result = self._generate_or_recall(
+            ("custom", category, name, num_variations, resolution, aspect_ratio, output_format, enable_web_search, seed),
+            prompt,
+            lambda: self.generator.generate_custom(
+                asset_category=category,
+                asset_name=name,
+                prompt=prompt,
+                num_images=num_variations,
+                resolution=resolution,
+                aspect_ratio=aspect_ratio,
+                output_format=output_format,
+                enable_web_search=enable_web_search,
+                save=True,
+                seed=seed,
+                deadline=as_deadline(deadline)
+            )
         )
         
         return {
             "success": "saved_paths" in result,
             "images": result.get("saved_paths", []),
+            "request_id": result.get("request_id"),
+            "bytes_written": result.get("saved_bytes", 0),
+            "cached": result.get("cached", False),
             "prompt_used": prompt,
             "category": category,
             "resolution": resolution,
@@ -213,95 +428,438 @@ class ClaudeCreativeAssistant:
             "web_search_enabled": enable_web_search
         }
     
-    def batch_generate(
+    def generate_drafts(
         self,
-        assets: List[Dict[str, Any]]
+        variants: List[Dict[str, Any]],
+        resolution: str = "1K",
+        max_workers: int = 4,
+        deadline: Union[None, float, Deadline] = None
     ) -> List[Dict[str, Any]]:
+        """
+        Generate cheap low-resolution drafts for many prompt variants in parallel
+        
+        Each draft records the parameters (including a fixed seed) needed to
+        replay it at a higher resolution with finalize_draft().
+        
+        Args:
+            variants: Custom asset specifications, each with category, name,
+                prompt and optionally num_variations, aspect_ratio, format, web_search
+            resolution: Draft resolution (default "1K")
+            max_workers: Number of drafts generated concurrently
+            deadline: Seconds from now or a Deadline for the whole set of drafts
+        
+        Returns:
+            List of results (in input order), each with "draft_id" and "parameters"
+        """
+        
+        deadline = as_deadline(deadline)
+        drafts_dir = self.output_dir / "drafts"
+        drafts_dir.mkdir(parents=True, exist_ok=True)
+        
+        def run_draft(variant: Dict[str, Any]) -> Dict[str, Any]:
+            draft_id = uuid.uuid4().hex[:12]
+            parameters = {
+                "category": variant.get("category", "custom"),
+                "name": variant.get("name", "asset"),
+                "prompt": variant.get("prompt", variant.get("description", "")),
+                "num_variations": variant.get("num_variations", 1),
+                "aspect_ratio": variant.get("aspect_ratio", "1:1"),
+                "output_format": variant.get("format", "png"),
+                "enable_web_search": variant.get("web_search", False),
+                "seed": variant.get("seed", random.randrange(2**31))
+            }
+            
+            try:
+                result = self.generate_custom_asset(
+                    **dict(parameters, category=f"drafts/{parameters['category']}"),
+                    resolution=resolution,
+                    deadline=deadline
+                )
+            except Exception as e:
+                result = {"success": False, "error": str(e), "images": []}
+            
+            result["draft_id"] = draft_id
+            result["parameters"] = parameters
+            with open(drafts_dir / f"{draft_id}.json", "w") as f:
+                json.dump(parameters, f, indent=2)
+            
+            return result
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Each task runs in a copy of the caller's context so trace spans nest correctly
+            futures = [
+                executor.submit(contextvars.copy_context().run, run_draft, variant)
+                for variant in variants
+            ]
+            return [future.result() for future in futures]
+    
+    def finalize_draft(
+        self,
+        draft: Any,
+        resolution: str = "4K",
+        deadline: Union[None, float, Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Promote a draft to full resolution by replaying its recorded parameters
+        
+        Args:
+            draft: Draft result from generate_drafts(), or its draft_id
+            resolution: Final resolution (default "4K")
+            deadline: Seconds from now or a Deadline; generation and downloads
+                that cannot finish in time are cancelled early
+        
+        Returns:
+            Dictionary with generated image paths and metadata
+        """
+        
+        if isinstance(draft, dict):
+            draft_id = draft["draft_id"]
+            parameters = draft["parameters"]
+        else:
+            draft_id = str(draft)
+            draft_file = self.output_dir / "drafts" / f"{draft_id}.json"
+            if not draft_file.exists():
+                raise ValueError(f"Unknown draft: {draft_id}")
+            with open(draft_file) as f:
+                parameters = json.load(f)
+        
+        result = self.generate_custom_asset(**parameters, resolution=resolution, deadline=deadline)
+        result["draft_id"] = draft_id
+        return result
+    
+    def batch_generate(
+        self,
+        assets: List[Dict[str, Any]],
+        deadline: Union[None, float, Deadline] = None
+    ) -> List[AssetResult]:
         """
         Generate multiple assets in batch
         
         Args:
             assets: List of asset specifications
                 Each should have: type, name, description, and type-specific fields
+            deadline: Seconds from now or a Deadline for the whole batch; items
+                that have not started when it passes are skipped
         
         Returns:
-            List of results for each asset
+            List of AssetResult records, one per asset
         """
         
+        deadline = as_deadline(deadline)
         results = []
         
-        for asset in assets:
-            asset_type = asset.get("type", "custom").lower()
+        with tracing.span("assistant.batch_generate", asset_count=len(assets)):
+            for index, asset in enumerate(assets):
+                results.append(self._generate_batch_item(index, asset, deadline))
+        
+        return results
+    
+    def iter_batch_generate(
+        self,
+        assets: Iterable[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        lookahead: Optional[int] = None,
+        deadline: Union[None, float, Deadline] = None
+    ) -> Iterator[AssetResult]:
+        """
+        Generate assets from any iterable, yielding results as each one completes
+        
+        Specifications are pulled lazily, so a manifest can be streamed from disk
+        and memory stays flat regardless of batch size. Workers do not wait for
+        write-behind storage; each result's files are flushed just before it
+        is yielded.
+        
+        Args:
+            assets: Iterable of asset specifications (same format as batch_generate)
+            max_workers: Number of assets generated concurrently (default 4, or
+                the limiter's max_limit so the adaptive limit is the real bound)
+            lookahead: Maximum specifications pulled ahead of completed results
+                (default 2 * max_workers)
+            deadline: Seconds from now or a Deadline for the whole batch; items
+                that have not started when it passes are reported as skipped
+        
+        Yields:
+            AssetResult records in completion order; `index` gives the
+            specification's position in the input
+        """
+        
+        max_workers = max_workers or self._default_workers()
+        lookahead = max(lookahead or max_workers * 2, max_workers)
+        deadline = as_deadline(deadline)
+        specs = enumerate(assets)
+        pending = {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            def submit_next() -> bool:
+                try:
+                    index, asset = next(specs)
+                except StopIteration:
+                    return False
+                # Each task runs in a copy of the caller's context so trace spans nest correctly
+                future = executor.submit(
+                    contextvars.copy_context().run, self._generate_unflushed, index, asset, deadline
+                )
+                pending[future] = index
+                return True
             
             try:
-                if asset_type == "product":
-                    result = self.generate_product_photo(
-                        product_name=asset.get("name", "product"),
-                        description=asset.get("description", ""),
-                        style=asset.get("style", "professional photography"),
-                        lighting=asset.get("lighting", "studio lighting"),
-                        background=asset.get("background", "white background"),
-                        num_variations=asset.get("num_variations", 1),
-                        resolution=asset.get("resolution", "2K"),
-                        aspect_ratio=asset.get("aspect_ratio", "1:1")
-                    )
+                while len(pending) < lookahead and submit_next():
+                    pass
                 
-                elif asset_type == "social":
-                    result = self.generate_social_post(
-                        platform=asset.get("platform", "instagram"),
-                        topic=asset.get("topic", asset.get("name", "post")),
-                        description=asset.get("description", ""),
-                        style=asset.get("style", "modern design"),
-                        mood=asset.get("mood", "professional"),
-                        num_variations=asset.get("num_variations", 1),
-                        resolution=asset.get("resolution", "2K"),
-                        aspect_ratio=asset.get("aspect_ratio", "1:1")
-                    )
-                
-                elif asset_type == "brand":
-                    result = self.generate_brand_element(
-                        brand_name=asset.get("brand_name", "brand"),
-                        element_type=asset.get("element_type", "logo"),
-                        description=asset.get("description", ""),
-                        style=asset.get("style", "modern"),
-                        colors=asset.get("colors", "professional colors"),
-                        num_variations=asset.get("num_variations", 1),
-                        resolution=asset.get("resolution", "2K"),
-                        aspect_ratio=asset.get("aspect_ratio", "1:1")
-                    )
-                
-                else:  # custom
-                    result = self.generate_custom_asset(
-                        category=asset.get("category", "custom"),
-                        name=asset.get("name", "asset"),
-                        prompt=asset.get("prompt", asset.get("description", "")),
-                        num_variations=asset.get("num_variations", 1),
-                        resolution=asset.get("resolution", "2K"),
-                        aspect_ratio=asset.get("aspect_ratio", "1:1"),
-                        output_format=asset.get("format", "png"),
-                        enable_web_search=asset.get("web_search", False)
-                    )
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = pending.pop(future)
+                        submit_next()
+                        result = self._flush_result(future.result())
+                        result.index = index
+                        yield result
+            finally:
+                # Consumer stopped early: drop work that has not started yet
+                for future in pending:
+                    future.cancel()
+    
+    def _generate_unflushed(self, index: int, asset: Dict[str, Any], deadline: Optional[Deadline]) -> AssetResult:
+        """Batch item whose writes may still be queued; iter_batch_generate flushes it before yielding"""
+        with deferred_flush():
+            return self._generate_batch_item(index, asset, deadline)
+    
+    def _flush_result(self, result: AssetResult) -> AssetResult:
+        """Wait for a result's files (and renditions) to be written, failing it on a write error"""
+        locations = list(result.images)
+        for outputs in (result.renditions or {}).values():
+            locations += [location for name, location in outputs.items() if name != "error"]
+        try:
+            self.generator.storage.flush(locations)
+        except Exception as e:
+            return result.copy(success=False, error=f"Failed to store images: {str(e)}")
+        return result
+    
+    def _default_workers(self) -> int:
+        """Batch concurrency: the limiter's max_limit so the adaptive limit is the real bound, else 4"""
+        limiter = self.generator.client.limiter
+        return limiter.max_limit if limiter is not None else 4
+    
+    def _generate_batch_item(
+        self,
+        index: int,
+        asset: Dict[str, Any],
+        deadline: Optional[Deadline] = None
+    ) -> AssetResult:
+        """Generate one batch specification, converting failures into an error result"""
+        
+        asset_name = asset.get("name", "unknown")
+        
+        if deadline is not None and deadline.expired():
+            return AssetResult(
+                success=False,
+                asset_name=asset_name,
+                error="Deadline exceeded before start",
+                skipped=True
+            )
+        
+        started = time.monotonic()
+        
+        spec = normalize_spec(asset)
+        key = request_key(spec) if self.cache is not None else None
+        if key is not None:
+            entry = self.cache.get(key)
+            if entry is not None:
+                return self._cached_result(entry, spec)
+        
+        with tracing.span(
+            "assistant.batch_item",
+            index=index,
+            asset_type=spec["type"],
+            asset_name=asset_name
+        ) as trace:
+            try:
+                # Specs may carry a stable key so a resumed batch re-attaches to its submit
+                with idempotency.namespace(asset.get("idempotency_key")):
+                    result = getattr(self, spec["method"])(**spec["arguments"], deadline=deadline)
                 
-                result["asset_name"] = asset.get("name", "unknown")
-                results.append(result)
+                trace.set(success=result["success"], image_count=len(result["images"]))
+                if key is not None and result["success"]:
+                    self.cache.put(key, {
+                        field: result.get(field)
+                        for field in ("images", "request_id", "prompt_used", "resolution", "aspect_ratio", "bytes_written")
+                    })
+                return AssetResult.from_output(
+                    result, asset_name, time.monotonic() - started, client=self.generator.client
+                )
                 
             except Exception as e:
-                results.append({
-                    "success": False,
-                    "error": str(e),
-                    "asset_name": asset.get("name", "unknown")
-                })
+                trace.set(success=False)
+                return AssetResult(
+                    success=False,
+                    asset_name=asset_name,
+                    error=str(e),
+                    elapsed=time.monotonic() - started
+                )
+    
+    _SPEC_FIELDS = {
+        "platform": "platform",
+        "element_type": "element_type",
+        "category": "category",
+        "web_search_enabled": "enable_web_search"
+    }
+    
+    def _cached_result(self, entry: Dict[str, Any], spec: Dict[str, Any]) -> AssetResult:
+        """Result record for a cache hit, with the per-type fields taken from the spec"""
+        output = dict(entry, success=True)
+        arguments = spec.get("arguments", {})
+        for field, argument in self._SPEC_FIELDS.items():
+            if argument in arguments:
+                output[field] = arguments[argument]
+        result = AssetResult.from_output(output, spec["name"], 0.0, client=self.generator.client)
+        result.cached = True
+        return result
+    
+    def plan_batch(
+        self,
+        assets: Iterable[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        dedupe: bool = True,
+        budget_seconds: Optional[float] = None,
+        budget_cost: Optional[float] = None,
+        resolution_seconds: Optional[Dict[str, float]] = None,
+        resolution_cost: Optional[Dict[str, float]] = None
+    ) -> BatchPlan:
+        """
+        Plan a batch without submitting anything
+        
+        Specifications are normalized with the same defaults batch_generate
+        uses, identical requests are collapsed, compatible requests (same
+        resolution, aspect ratio and format) are grouped, and the result cache
+        is consulted when enabled. plan.summary() is a dry-run report with the
+        request count, estimated wall-clock time and spend.
+        
+        With a time or spend budget, requests are weighed by resolution and
+        variation count and admitted cheapest first, so the most assets
+        finish inside it; the rest are deferred and listed in the summary.
+        
+        Args:
+            assets: Asset specifications (same format as batch_generate)
+            max_workers: Concurrency assumed by the estimate (defaults as in
+                iter_batch_generate)
+            dedupe: Collapse identical requests into one
+            budget_seconds: Wall-clock budget for the run (e.g. a nightly window)
+            budget_cost: Spend budget in the units of resolution_cost (USD by default)
+            resolution_seconds: Per-resolution request durations (see fal_api.DEFAULT_RESOLUTION_SECONDS)
+            resolution_cost: Per-resolution price per image (see planner.DEFAULT_RESOLUTION_COST)
+        
+        Returns:
+            BatchPlan to inspect or pass to run_plan()
+        """
+        return plan_batch(
+            assets,
+            max_workers=max_workers or self._default_workers(),
+            dedupe=dedupe,
+            cache=self.cache,
+            resolution_seconds=resolution_seconds,
+            resolution_cost=resolution_cost,
+            budget_seconds=budget_seconds,
+            budget_cost=budget_cost
+        )
+    
+    def run_plan(
+        self,
+        plan: BatchPlan,
+        deadline: Union[None, float, Deadline] = None
+    ) -> List[AssetResult]:
+        """
+        Execute a plan
+        
+        Only items that need a request are generated, in the plan's order;
+        cache hits and duplicates receive the saved images of their source
+        item, and items deferred by the plan's budget come back skipped.
+        
+        Args:
+            plan: Plan from plan_batch()
+            deadline: Seconds from now or a Deadline for the whole run
+        
+        Returns:
+            AssetResult records in input order
+        """
+        
+        results: List[Optional[AssetResult]] = [None] * len(plan.items)
+        requests = plan.requests
+        
+        with tracing.span("assistant.run_plan", request_count=len(requests), item_count=len(plan.items)):
+            for result in self.iter_batch_generate(
+                (item.asset for item in requests),
+                max_workers=plan.max_workers,
+                deadline=deadline
+            ):
+                item = requests[result.index]
+                result.index = item.index
+                results[item.index] = result
+        
+        # A duplicate always points at an earlier item, so one pass in input order resolves both
+        for item in plan.items:
+            if item.cached is not None:
+                results[item.index] = self._cached_result(item.cached, item.spec).copy(index=item.index)
+            elif item.duplicate_of is not None:
+                results[item.index] = results[item.duplicate_of].copy(index=item.index, asset_name=item.spec["name"])
+            elif item.deferred:
+                results[item.index] = AssetResult(
+                    success=False,
+                    asset_name=item.spec["name"],
+                    error="Deferred: outside the batch budget",
+                    skipped=True,
+                    index=item.index
+                )
         
         return results
     
+    def generate_scene_assets(
+        self,
+        script: Union[str, Dict[str, Any]],
+        resolution: str = "2K",
+        num_variations: int = 1,
+        max_workers: Optional[int] = None,
+        deadline: Union[None, float, Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate background and visual assets for every scene of a Remotion script
+        
+        Scenes are generated concurrently into <output_dir>/videos/<video title>/,
+        matching the script's width/height to the nearest supported aspect ratio.
+        
+        Args:
+            script: Scene script (remotion-script-writer JSON) or path to it
+            resolution: Image resolution
+            num_variations: Variations per asset
+            max_workers: Assets generated at once
+            deadline: Seconds from now or a Deadline for the whole video
+        
+        Returns:
+            Manifest mapping scene numbers to generated files (also written
+            to manifest.json in the video's directory)
+        """
+        
+        with tracing.span("assistant.generate_scene_assets"):
+            return scenes.generate_scene_assets(
+                self,
+                script,
+                resolution=resolution,
+                num_variations=num_variations,
+                max_workers=max_workers,
+                deadline=deadline
+            )
+    
     def get_asset_summary(self) -> Dict[str, Any]:
         """
         Get summary of all generated assets
         
         Returns:
-            Dictionary with asset counts and organization
+            Dictionary with asset counts and organization (with live_summary,
+            also total_bytes and bytes_by_category)
         """
         
+        if self.asset_index is not None:
+            return self.asset_index.summary()
+        
         summary = {
             "total_assets": 0,
             "by_category": {},
@@ -310,8 +868,15 @@ class ClaudeCreativeAssistant:
         
         if self.output_dir.exists():
             for category_dir in self.output_dir.iterdir():
-                if category_dir.is_dir():
-                    count = len(list(category_dir.rglob("*.png"))) + len(list(category_dir.rglob("*.jpeg"))) + len(list(category_dir.rglob("*.webp")))
+                # Skip internal directories such as the content-addressed .store
+                if category_dir.is_dir() and not category_dir.name.startswith("."):
+                    # Derived renditions are not counted as separate assets
+                    count = sum(
+                        1
+                        for pattern in ("*.png", "*.jpeg", "*.webp")
+                        for path in category_dir.rglob(pattern)
+                        if path.parent.name != "renditions"
+                    )
                     if count > 0:
                         summary["by_category"][category_dir.name] = count
                         summary["total_assets"] += count
@@ -319,16 +884,92 @@ class ClaudeCreativeAssistant:
         return summary
 
 
-# Global assistant instance
-_assistant = None
+class AssistantRegistry:
+    """
+    Thread-safe set of per-tenant assistants sharing one API client
+
+    Each tenant (a brand, customer or output directory) gets its own
+    assistant and output tree, while the HTTP connection pool, adaptive
+    limiter and hedging policy live in a single NanobananProClient created
+    on first use.
+    """
+
+    def __init__(self, client: Optional[NanobananProClient] = None, **client_options):
+        """
+        Initialize the registry
+
+        Args:
+            client: Client to share (created lazily when None)
+            **client_options: Passed to NanobananProClient when it is created
+                (api_key, key_pool, limiter, hedge, pool_size, http2, memory_budget,
+                storage for download_image)
+        """
+        self._client = client
+        self._client_options = client_options
+        self._assistants: Dict[str, ClaudeCreativeAssistant] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> NanobananProClient:
+        """The shared API client"""
+        with self._lock:
+            if self._client is None:
+                self._client = NanobananProClient(**self._client_options)
+            return self._client
+
+    def get(
+        self,
+        output_dir: str = "./assets",
+        tenant: Optional[str] = None,
+        **options
+    ) -> ClaudeCreativeAssistant:
+        """
+        Get or create the assistant for a tenant
+
+        Args:
+            output_dir: Base directory for the tenant's assets
+            tenant: Tenant name; defaults to the resolved output directory
+            **options: ClaudeCreativeAssistant options (deduplicate, storage,
+                renditions) used only when the assistant is first created
+
+        Returns:
+            The tenant's assistant
+        """
+        key = tenant or str(Path(output_dir).resolve())
+        assistant = self._assistants.get(key)
+        if assistant is not None:
+            return assistant
 
+        client = self.client
+        with self._lock:
+            assistant = self._assistants.get(key)
+            if assistant is None:
+                assistant = ClaudeCreativeAssistant(output_dir=output_dir, client=client, **options)
+                self._assistants[key] = assistant
+            return assistant
 
-def get_assistant(output_dir: str = "./assets") -> ClaudeCreativeAssistant:
-    """Get or create the global assistant instance"""
-    global _assistant
-    if _assistant is None:
-        _assistant = ClaudeCreativeAssistant(output_dir=output_dir)
-    return _assistant
+    def remove(self, tenant: str) -> Optional[ClaudeCreativeAssistant]:
+        """Forget a tenant's assistant (its files are left in place; call close() on it when done)"""
+        with self._lock:
+            return self._assistants.pop(tenant, None)
+
+    def tenants(self) -> List[str]:
+        """Keys of the registered assistants"""
+        with self._lock:
+            return list(self._assistants)
+
+
+# Process-wide registry used by the convenience functions
+_registry = AssistantRegistry()
+
+
+def get_assistant(output_dir: str = "./assets", tenant: Optional[str] = None) -> ClaudeCreativeAssistant:
+    """
+    Get or create the assistant for an output directory or tenant
+
+    All assistants returned here share one API client.
+    """
+    return _registry.get(output_dir, tenant)
 
 
 # Convenience functions for Claude Code
@@ -396,10 +1037,23 @@ def generate_asset(
     )
 
 
-def batch_generate_assets(assets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def batch_generate_assets(
+    assets: List[Dict[str, Any]],
+    deadline: Union[None, float, Deadline] = None
+) -> List[AssetResult]:
     """Quick function to batch generate assets"""
     assistant = get_assistant()
-    return assistant.batch_generate(assets)
+    return assistant.batch_generate(assets, deadline=deadline)
+
+
+def iter_batch_generate_assets(
+    assets: Iterable[Dict[str, Any]],
+    max_workers: Optional[int] = None,
+    deadline: Union[None, float, Deadline] = None
+) -> Iterator[AssetResult]:
+    """Quick function to stream batch results as they complete"""
+    assistant = get_assistant()
+    return assistant.iter_batch_generate(assets, max_workers=max_workers, deadline=deadline)
 
 
 def get_summary() -> Dict[str, Any]:
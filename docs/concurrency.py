@@ -0,0 +1,324 @@
+"""
+Adaptive Concurrency Module
+AIMD controller that sizes the number of in-flight generation requests from
+observed latency, 429 throttling and 5xx error rates, and a byte budget that
+bounds image data buffered in memory
+"""
+
+import threading
+import time
+from typing import Optional, List, Dict, Any
+
+
+class AdaptiveLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests
+
+    Every successful, fast response grows the limit by 1/limit (about +1 per
+    round of requests). A 429, a 5xx, a transport error or a response slower
+    than latency_tolerance times the baseline shrinks it by decrease_factor,
+    at most once per cooldown so one burst of failures counts as one signal.
+    Callers whose requests differ in expected duration should pass latency
+    normalized to a common reference (NanobananProClient scales each submit
+    to a single 2K image), so larger requests do not read as slow ones.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        decrease_factor: float = 0.7,
+        latency_tolerance: float = 2.0,
+        target_latency: Optional[float] = None,
+        cooldown: float = 1.0
+    ):
+        """
+        Initialize the limiter
+
+        Args:
+            initial_limit: Starting in-flight limit
+            min_limit: Lowest limit the controller will go to
+            max_limit: Highest limit the controller will go to
+            decrease_factor: Multiplier applied on overload (0-1)
+            latency_tolerance: Overload when latency exceeds baseline * tolerance
+            target_latency: Fixed latency threshold in seconds; when None the
+                baseline is learned from the fastest recent responses
+            cooldown: Minimum seconds between two decreases
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._baseline: Optional[float] = None
+        self._last_decrease = 0.0
+        self._counts = {"successes": 0, "throttled": 0, "server_errors": 0, "errors": 0, "slow": 0}
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Current in-flight limit"""
+        return int(self._limit)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for an in-flight slot
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if a slot was taken, False on timeout
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < int(self._limit), timeout):
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, latency: float, status_code: Optional[int] = None, error: bool = False) -> None:
+        """
+        Return a slot and feed the outcome to the controller
+
+        Args:
+            latency: Request duration in seconds (normalized by the caller
+                when request sizes differ)
+            status_code: HTTP status, if a response was received
+            error: True for transport failures (timeouts, connection errors)
+        """
+        with self._condition:
+            self._in_flight -= 1
+
+            if status_code == 429:
+                self._counts["throttled"] += 1
+                self._decrease()
+            elif status_code is not None and status_code >= 500:
+                self._counts["server_errors"] += 1
+                self._decrease()
+            elif error:
+                self._counts["errors"] += 1
+                self._decrease()
+            elif self._is_slow(latency):
+                self._counts["slow"] += 1
+                self._decrease()
+            else:
+                self._counts["successes"] += 1
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+            self._condition.notify_all()
+
+    def cancel(self) -> None:
+        """Return a slot without an outcome (e.g. the caller's own deadline cut the request short)"""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def _is_slow(self, latency: float) -> bool:
+        if self.target_latency is not None:
+            return latency > self.target_latency
+
+        # Decaying minimum: tracks the fastest recent responses but drifts up
+        # slowly so a permanently slower provider resets the baseline
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline *= 1.01
+        return latency > self._baseline * self.latency_tolerance
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Snapshot of controller state
+
+        Returns:
+            Dictionary with the current limit, in-flight count, learned
+            baseline latency and outcome counters
+        """
+        with self._condition:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "baseline_latency": self._baseline,
+                **self._counts
+            }
+
+
+class Reservation:
+    """Bytes held against a MemoryBudget for one buffered image"""
+
+    __slots__ = ("_budget", "size")
+
+    def __init__(self, budget: "MemoryBudget", size: int):
+        self._budget = budget
+        self.size = size
+
+    def fit(self, nbytes: int) -> None:
+        """
+        Grow the reservation to at least nbytes
+
+        Growth never blocks: a body already being read is allowed to finish,
+        while new reservations wait until the budget has room again.
+        """
+        if nbytes > self.size:
+            self._budget._adjust(nbytes - self.size)
+            self.size = nbytes
+
+    def settle(self, nbytes: int) -> None:
+        """Set the reservation to the final image size (returns an overestimate)"""
+        if nbytes != self.size:
+            self._budget._adjust(nbytes - self.size)
+            self.size = nbytes
+
+    def spawn(self) -> "Reservation":
+        """Empty reservation on the same budget, grown without waiting (e.g. by a hedged duplicate)"""
+        return Reservation(self._budget, 0)
+
+    def release(self) -> None:
+        """Return the bytes (safe to call more than once)"""
+        if self.size:
+            self._budget._adjust(-self.size)
+            self.size = 0
+
+    def __enter__(self) -> "Reservation":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.release()
+        return False
+
+
+class MemoryBudget:
+    """
+    Global limit on image bytes buffered in memory
+
+    Each buffered download reserves an estimate before it starts, grows the
+    reservation to its Content-Length or the bytes actually received, and
+    settles it at the final size; it is released once the image has been
+    stored. All images of one generation are reserved together, so a worker
+    never holds part of the budget while waiting for more. New downloads
+    wait while the budget is full, and new submissions wait while usage is
+    above submit_threshold, so generation does not run ahead of downloads
+    and writes that cannot keep up. A request larger than the whole budget
+    is admitted when nothing else is held, so it cannot stall forever.
+    """
+
+    def __init__(
+        self,
+        limit_bytes: int,
+        image_estimate: int = 8 * 1024 * 1024,
+        submit_threshold: float = 0.8
+    ):
+        """
+        Initialize the budget
+
+        Args:
+            limit_bytes: Maximum bytes of buffered image data
+            image_estimate: Bytes reserved for a download before its size is known
+            submit_threshold: Fraction of the budget above which new
+                generation submits wait (0-1)
+        """
+        if limit_bytes <= 0:
+            raise ValueError("limit_bytes must be positive")
+        if not 0 < submit_threshold <= 1:
+            raise ValueError("submit_threshold must be between 0 and 1")
+
+        self.limit_bytes = limit_bytes
+        self.image_estimate = image_estimate
+        self.submit_threshold = submit_threshold
+
+        self._used = 0
+        self._peak = 0
+        self._counts = {"reservations": 0, "download_waits": 0, "submit_waits": 0}
+        self._condition = threading.Condition()
+
+    @property
+    def used(self) -> int:
+        """Bytes currently reserved"""
+        return self._used
+
+    def reserve(
+        self,
+        count: int = 1,
+        nbytes: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[List[Reservation]]:
+        """
+        Wait for room to buffer a set of images, taken all at once
+
+        Args:
+            count: Number of images
+            nbytes: Bytes to reserve per image (default image_estimate)
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            One Reservation per image, or None on timeout
+        """
+        nbytes = self.image_estimate if nbytes is None else nbytes
+        total = nbytes * count
+        with self._condition:
+            def has_room() -> bool:
+                return self._used == 0 or self._used + total <= self.limit_bytes
+
+            if not has_room():
+                self._counts["download_waits"] += 1
+                if not self._condition.wait_for(has_room, timeout):
+                    return None
+            self._counts["reservations"] += count
+            self._used += total
+            self._peak = max(self._peak, self._used)
+        return [Reservation(self, nbytes) for _ in range(count)]
+
+    def wait_for_room(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until usage is below the submit threshold
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+
+        Returns:
+            True once there is room, False on timeout
+        """
+        threshold = self.limit_bytes * self.submit_threshold
+        with self._condition:
+            if self._used < threshold:
+                return True
+            self._counts["submit_waits"] += 1
+            return self._condition.wait_for(lambda: self._used < threshold, timeout)
+
+    def _adjust(self, delta: int) -> None:
+        with self._condition:
+            self._used += delta
+            self._peak = max(self._peak, self._used)
+            if delta < 0:
+                self._condition.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Snapshot of budget state
+
+        Returns:
+            Dictionary with the limit, bytes in use, peak bytes and wait counters
+        """
+        with self._condition:
+            return {
+                "limit_bytes": self.limit_bytes,
+                "used_bytes": self._used,
+                "peak_bytes": self._peak,
+                **self._counts
+            }
@@ -10,6 +10,8 @@ import sys
 from pathlib import Path
 from typing import Optional
 from fal_api import CreativeAssetGenerator, NanobananProClient
+from profiling import RunProfiler
+from claude_integration import ClaudeCreativeAssistant
 
 
 def print_success(message: str):
@@ -175,6 +177,38 @@ def generate_custom(args):
         return 1
 
 
+def generate_scenes(args):
+    """Generate scene assets for a Remotion script"""
+    try:
+        with ClaudeCreativeAssistant(output_dir=args.output_dir) as assistant:
+            print_info(f"Generating scene assets for: {args.script}")
+            print_info(f"Resolution: {args.resolution}")
+            
+            manifest = assistant.generate_scene_assets(
+                args.script,
+                resolution=args.resolution,
+                num_variations=args.num_images,
+                max_workers=args.workers
+            )
+            
+            failed = 0
+            for number, scene in manifest["scenes"].items():
+                files = scene["background"] + [path for paths in scene["images"].values() for path in paths]
+                print_success(f"Scene {number}: {len(files)} image(s)")
+                for path in files:
+                    print(f"  🎬 {path}")
+                for error in scene["errors"]:
+                    failed += 1
+                    print_error(f"Scene {number} {error['name']}: {error['error']}")
+            
+        print_info(f"Manifest: {manifest['manifest_path']}")
+        return 1 if failed else 0
+        
+    except Exception as e:
+        print_error(f"Failed to generate scene assets: {str(e)}")
+        return 1
+
+
 def test_api(args):
     """Test nanobanana pro API connection"""
     try:
@@ -221,8 +255,14 @@ Examples:
   # Generate custom asset with web search
   python creative_cli.py custom --category "thumbnails" --name "video-1" --prompt "YouTube thumbnail..." --web-search
   
+  # Generate background and visual assets for every scene of a Remotion script
+  python creative_cli.py scenes --script product-demo-example.json
+  
   # Test API connection
   python creative_cli.py test
+  
+  # Profile a run (report written to the output directory)
+  python creative_cli.py --profile --trace-memory product --product-name "Luxury Watch" --prompt "..."
         """
     )
     
@@ -232,6 +272,18 @@ Examples:
         help="Output directory for generated assets (default: ./assets)"
     )
     
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile CPU time and per-phase wall time; writes a report to the output directory"
+    )
+    
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Track memory allocations (peak and top allocation sites) in the profile report"
+    )
+    
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
     
     # Product photo command
@@ -354,6 +406,29 @@ Examples:
     )
     custom_parser.set_defaults(func=generate_custom)
     
+    # Remotion scene assets command
+    scenes_parser = subparsers.add_parser("scenes", help="Generate assets for a Remotion scene script")
+    scenes_parser.add_argument("--script", required=True, help="Scene script JSON (remotion-script-writer format)")
+    scenes_parser.add_argument(
+        "--resolution",
+        default="2K",
+        choices=["1K", "2K", "4K"],
+        help="Image resolution (default: 2K)"
+    )
+    scenes_parser.add_argument(
+        "--num-images",
+        type=int,
+        default=1,
+        help="Variations per asset (1-4, default: 1)"
+    )
+    scenes_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Assets generated concurrently (default: 4)"
+    )
+    scenes_parser.set_defaults(func=generate_scenes)
+    
     # Test API command
     test_parser = subparsers.add_parser("test", help="Test nanobanana pro API connection")
     test_parser.set_defaults(func=test_api)
@@ -362,7 +437,12 @@ Examples:
     args = parser.parse_args()
     
     # Execute command
-    if args.command:
+    if args.command and (args.profile or args.trace_memory):
+        with RunProfiler(cpu=args.profile, memory=args.trace_memory) as profiler:
+            status = args.func(args)
+        print_info(f"Profile report: {profiler.write_report(args.output_dir, args.command)}")
+        return status
+    elif args.command:
         return args.func(args)
     else:
         parser.print_help()
@@ -0,0 +1,87 @@
+"""
+Deadline Module
+Overall time budgets that flow from callers down to submission, polling and downloads
+"""
+
+import time
+from typing import Optional, Union
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised when work cannot start or finish before the caller's deadline"""
+
+
+class Deadline:
+    """An absolute point in time (monotonic clock) by which work must finish"""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        """
+        Initialize a deadline
+
+        Args:
+            expires_at: time.monotonic() value at which the deadline passes
+        """
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        """Deadline a number of seconds from now"""
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """Seconds left (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, operation: str = "operation") -> None:
+        """
+        Raise if the deadline has passed
+
+        Args:
+            operation: Description used in the error message
+        """
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline exceeded before {operation}")
+
+    def timeout(self, cap: float, operation: str = "operation") -> float:
+        """
+        Per-call timeout bounded by the time left
+
+        Args:
+            cap: The call's normal timeout in seconds
+            operation: Description used in the error message if already expired
+
+        Returns:
+            min(cap, remaining seconds)
+        """
+        self.check(operation)
+        return min(cap, self.remaining())
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
+
+
+def as_deadline(value: Union[None, float, int, Deadline]) -> Optional[Deadline]:
+    """
+    Normalize a caller-supplied deadline
+
+    Args:
+        value: None, a number of seconds from now, or a Deadline
+
+    Returns:
+        Deadline or None
+    """
+    if value is None or isinstance(value, Deadline):
+        return value
+    return Deadline.after(float(value))
+
+
+def call_timeout(deadline: Optional[Deadline], cap: float, operation: str = "operation") -> float:
+    """Timeout for one call: cap, shortened to the deadline's remaining time if there is one"""
+    if deadline is None:
+        return cap
+    return deadline.timeout(cap, operation)
@@ -5,26 +5,119 @@ Handles all interactions with FAL.ai nanobanana pro image generation model
 
 import os
 import json
+import time
+import random
+import threading
+import uuid
 import requests
+from collections import OrderedDict
 from typing import Optional, Dict, Any, List
 from pathlib import Path
 from datetime import datetime
 
+import tracing
+from storage import AssetStorage, LocalStorage, flush_is_deferred
+from renditions import RenditionPipeline
+from perceptual import PerceptualIndex
+from concurrency import AdaptiveLimiter, MemoryBudget, Reservation
+from hedging import HedgePolicy
+from deadline import Deadline, DeadlineExceeded, call_timeout
+import idempotency
+from idempotency import SubmitJournal
+from keypool import KeyPool
+from transport import Http2Session
+
+# Read size used when streaming image downloads into storage
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Aspect ratios nanobanana pro accepts
+ASPECT_RATIOS = ["21:9", "16:9", "3:2", "4:3", "5:4", "1:1", "4:5", "3:4", "2:3", "9:16"]
+
+# Typical seconds for one generation request (submit through download) per resolution
+DEFAULT_RESOLUTION_SECONDS = {"1K": 8.0, "2K": 15.0, "4K": 30.0}
+
+# Extra seconds per additional variation in the same request
+PER_IMAGE_SECONDS = 2.0
+
+# Request IDs remembered per client so status polls use the submitting account
+REQUEST_KEY_CACHE_SIZE = 10000
+
+
+def request_seconds(
+    resolution: str,
+    num_images: int = 1,
+    resolution_seconds: Optional[Dict[str, float]] = None
+) -> float:
+    """Typical duration of one generation request at a resolution and image count"""
+    table = resolution_seconds or DEFAULT_RESOLUTION_SECONDS
+    base = table.get(resolution, table.get("2K", 15.0))
+    return base + PER_IMAGE_SECONDS * (max(1, num_images) - 1)
+
+
+class _RetryableSubmit(Exception):
+    """A submit failed in a way that may succeed when retried with the same key"""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, api_key: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.api_key = api_key
+
 class NanobananProClient:
     """Client for FAL.ai nanobanana pro image generation API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        hedge: Optional[HedgePolicy] = None,
+        pool_size: int = 32,
+        journal: Optional[SubmitJournal] = None,
+        submit_retries: int = 2,
+        key_pool: Optional[KeyPool] = None,
+        http2: bool = False,
+        memory_budget: Optional[MemoryBudget] = None,
+        storage: Optional[AssetStorage] = None
+    ):
         """
         Initialize nanobanana pro API client
         
+        A client is safe to share between threads and between several
+        generators, which then share its connection pool, limiter and hedge.
+        
         Args:
             api_key: FAL.ai API key (defaults to FAL_API_KEY or FAL_KEY env var)
+            limiter: Optional adaptive in-flight limit for generation submits,
+                tuned from observed latency, 429s and 5xx responses
+            hedge: Optional hedging policy for idempotent status polls and
+                image downloads
+            pool_size: Keep-alive connections kept per host (in total with http2)
+            journal: Optional record of idempotency key -> request ID; inside an
+                idempotency.namespace() a resubmit of the same payload
+                re-attaches to the recorded request via get_request_status
+            submit_retries: Retries for submits that time out, fail to connect
+                or get a 429/5xx; every attempt carries the same Idempotency-Key
+            key_pool: Optional pool of API keys; each submit uses the least
+                loaded healthy key (defaults to FAL_API_KEYS, comma-separated,
+                when no api_key is given)
+            http2: Multiplex submits, status polls and downloads over HTTP/2
+                connections (one per host where supported, HTTP/1.1 otherwise);
+                requires httpx[http2]
+            memory_budget: Optional cap on image bytes buffered in memory;
+                buffered downloads wait for room and submits wait while
+                downloads are saturated
+            storage: Backend download_image writes through, keyed by the
+                output path (e.g. a WriteBehindStorage with a durability
+                mode); defaults to LocalStorage relative to the working directory
         """
+        if key_pool is None and not api_key:
+            key_pool = KeyPool.from_env()
+        self.key_pool = key_pool
+        
         # Try both FAL_API_KEY and FAL_KEY environment variables
-        self.api_key = api_key or os.getenv("FAL_API_KEY") or os.getenv("FAL_KEY")
+        self.api_key = api_key or (key_pool.keys[0] if key_pool else None) or os.getenv("FAL_API_KEY") or os.getenv("FAL_KEY")
         if not self.api_key:
             raise ValueError(
-                "FAL_API_KEY or FAL_KEY not found. Set one of these environment variables or pass api_key parameter."
+                "FAL_API_KEY, FAL_KEY or FAL_API_KEYS not found. Set one of these environment variables or pass api_key parameter."
             )
         
         self.base_url = "https://api.fal.ai/v1"
@@ -33,6 +126,25 @@ class NanobananProClient:
             "Authorization": f"Key {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.limiter = limiter
+        self.hedge = hedge
+        if hedge is not None and limiter is not None:
+            hedge.size_for(limiter.max_limit)
+        self.journal = journal
+        self.submit_retries = submit_retries
+        self.memory_budget = memory_budget
+        self._request_keys: "OrderedDict[str, str]" = OrderedDict()
+        self._request_keys_lock = threading.Lock()
+        # download_image targets; LocalStorage remembers created directories across calls
+        self.storage = storage if storage is not None else LocalStorage(".")
+        
+        if http2:
+            self.session = Http2Session(pool_size=pool_size)
+        else:
+            self.session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
     
     def generate_image(
         self,
@@ -42,7 +154,9 @@ class NanobananProClient:
         resolution: str = "2K",
         output_format: str = "png",
         enable_web_search: bool = False,
-        sync_mode: bool = False
+        sync_mode: bool = False,
+        seed: Optional[int] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate image using nanobanana pro
@@ -58,6 +172,10 @@ class NanobananProClient:
                 Options: jpeg, png, webp
             enable_web_search: Enable Google Search integration (default False)
             sync_mode: Return as data URI (default False)
+            seed: Random seed; the same seed and parameters reproduce a
+                composition (default None, server picks one)
+            deadline: Overall deadline; bounds the wait for a concurrency slot
+                and the request timeout (default None, 300 second timeout)
         
         Returns:
             Dictionary with generated images and metadata
@@ -70,9 +188,8 @@ class NanobananProClient:
         if num_images < 1 or num_images > 4:
             raise ValueError("num_images must be between 1 and 4")
         
-        valid_aspect_ratios = ["21:9", "16:9", "3:2", "4:3", "5:4", "1:1", "4:5", "3:4", "2:3", "9:16"]
-        if aspect_ratio not in valid_aspect_ratios:
-            raise ValueError(f"aspect_ratio must be one of {valid_aspect_ratios}")
+        if aspect_ratio not in ASPECT_RATIOS:
+            raise ValueError(f"aspect_ratio must be one of {ASPECT_RATIOS}")
         
         valid_resolutions = ["1K", "2K", "4K"]
         if resolution not in valid_resolutions:
@@ -92,92 +209,586 @@ class NanobananProClient:
             "sync_mode": sync_mode,
             "enable_web_search": enable_web_search
         }
+        if seed is not None:
+            payload["seed"] = seed
         
         # Make API request
         endpoint = f"{self.base_url}/models/{self.model_id}/requests"
         
+        # Deterministic inside an idempotency namespace, random per call otherwise
+        scope = idempotency.current_namespace()
+        key = idempotency.idempotency_key(payload, scope)
+        headers = dict(self.headers, **{"Idempotency-Key": key})
+        journal = self.journal if scope is not None else None
+        
+        with tracing.span(
+            "client.generate_image",
+            prompt_chars=len(prompt),
+            num_images=num_images,
+            resolution=resolution,
+            aspect_ratio=aspect_ratio
+        ) as trace:
+            request_id = journal.lookup(key) if journal is not None else None
+            if request_id:
+                try:
+                    result = self.get_request_status(request_id, deadline)
+                    if result.get("images"):
+                        trace.set(request_id=request_id, reattached=True)
+                        return result
+                except RuntimeError:
+                    pass  # Expired or failed upstream; submit again under the same key
+            
+            attempt = 0
+            pinned_key = None
+            while True:
+                try:
+                    result = self._submit(endpoint, payload, headers, deadline, trace, pinned_key)
+                    break
+                except _RetryableSubmit as e:
+                    # The idempotency key only dedupes within one account, so a
+                    # submit that may have landed is retried with the same API key
+                    pinned_key = e.api_key if e.status_code is None else None
+                    if attempt >= self.submit_retries:
+                        raise RuntimeError(f"FAL.ai API error: {str(e)}")
+                    # Exponential backoff with jitter, never sleeping past the deadline
+                    backoff = min(8.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+                    if deadline is not None and deadline.remaining() <= backoff:
+                        raise DeadlineExceeded(f"Deadline exceeded retrying generation: {str(e)}")
+                    attempt += 1
+                    trace.set(retries=attempt)
+                    time.sleep(backoff)
+            
+            if journal is not None and result.get("request_id"):
+                journal.record(key, result["request_id"])
+            return result
+    
+    def _submit(
+        self,
+        endpoint: str,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        deadline: Optional[Deadline],
+        trace,
+        pinned_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """One submit attempt under the memory budget, concurrency limiter and key pool"""
+        if self.memory_budget is not None:
+            wait_timeout = deadline.remaining() if deadline is not None else None
+            if not self.memory_budget.wait_for_room(timeout=wait_timeout):
+                raise DeadlineExceeded("Deadline exceeded waiting for downloads to drain")
+        
+        api_key = None
+        if self.key_pool is not None:
+            wait_timeout = deadline.remaining() if deadline is not None else None
+            api_key = self.key_pool.acquire(timeout=wait_timeout, key=pinned_key)
+            if api_key is None:
+                raise DeadlineExceeded("Deadline exceeded waiting for an API key")
+            headers = dict(headers, Authorization=f"Key {api_key}")
+        
+        if self.limiter is not None:
+            wait_timeout = deadline.remaining() if deadline is not None else None
+            if not self.limiter.acquire(timeout=wait_timeout):
+                if api_key is not None:
+                    self.key_pool.release(api_key)
+                raise DeadlineExceeded("Deadline exceeded waiting for a concurrency slot")
+            trace.set(concurrency_limit=self.limiter.limit)
+        started = time.monotonic()
+        status_code = None
+        # Failures caused by the caller's deadline say nothing about the provider or the key
+        cut_short = False
+        
         try:
-            response = requests.post(
+            timeout = call_timeout(deadline, 300, "submitting generation")
+            response = self.session.post(
                 endpoint,
                 json=payload,
-                headers=self.headers,
-                timeout=300
+                headers=headers,
+                timeout=timeout
             )
+            status_code = response.status_code
             response.raise_for_status()
             
             result = response.json()
+            trace.set(
+                request_id=result.get("request_id"),
+                image_count=len(result.get("images", [])),
+                response_bytes=len(response.content)
+            )
+            if api_key is not None and result.get("request_id"):
+                self._remember_key(result["request_id"], api_key)
             return result
             
+        except DeadlineExceeded:
+            cut_short = True
+            raise
+        
         except requests.exceptions.RequestException as e:
+            if deadline is not None and (
+                deadline.expired() or (isinstance(e, requests.exceptions.Timeout) and timeout < 300)
+            ):
+                cut_short = True
+                raise DeadlineExceeded(f"Deadline exceeded during generation: {str(e)}")
+            if status_code is None or status_code == 429 or status_code >= 500:
+                raise _RetryableSubmit(str(e), status_code, api_key)
+            if status_code in (401, 403) and api_key is not None and len(self.key_pool.keys) > 1:
+                raise _RetryableSubmit(str(e), status_code, api_key)  # Rejected key; another may work
             raise RuntimeError(f"FAL.ai API error: {str(e)}")
+        
+        finally:
+            if self.limiter is not None and cut_short:
+                self.limiter.cancel()
+            elif self.limiter is not None:
+                # Scaled to one 2K image, so 4K or multi-image requests are not taken for overload
+                expected = request_seconds(payload.get("resolution", "2K"), payload.get("num_images", 1))
+                self.limiter.release(
+                    (time.monotonic() - started) * DEFAULT_RESOLUTION_SECONDS["2K"] / expected,
+                    status_code=status_code,
+                    error=status_code is None
+                )
+            if api_key is not None:
+                # No status and no error leaves the key's health untouched
+                self.key_pool.release(api_key, status_code=status_code, error=status_code is None and not cut_short)
+    
+    def _remember_key(self, request_id: str, api_key: str) -> None:
+        with self._request_keys_lock:
+            self._request_keys[request_id] = api_key
+            self._request_keys.move_to_end(request_id)
+            while len(self._request_keys) > REQUEST_KEY_CACHE_SIZE:
+                self._request_keys.popitem(last=False)
     
-    def get_request_status(self, request_id: str) -> Dict[str, Any]:
+    def _status_keys(self, request_id: str) -> List[str]:
+        """API keys to poll a request with, the submitting one first when known"""
+        if self.key_pool is None:
+            return [self.api_key]
+        with self._request_keys_lock:
+            known = self._request_keys.get(request_id)
+        if known is not None:
+            return [known]
+        # Submitted by another process (e.g. a resumed batch): try each account
+        return self.key_pool.keys
+    
+    def get_request_status(self, request_id: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """
         Get status of a submitted request
         
         Args:
             request_id: ID of the request
+            deadline: Overall deadline bounding the poll timeout
         
         Returns:
             Request status and result if complete
         """
         endpoint = f"{self.base_url}/models/{self.model_id}/requests/{request_id}"
+        api_keys = self._status_keys(request_id)
         
-        try:
-            response = requests.get(
-                endpoint,
-                headers=self.headers,
-                timeout=30
+        def poll(api_key: str) -> Dict[str, Any]:
+            headers = dict(self.headers, Authorization=f"Key {api_key}")
+            
+            def attempt(cancelled: Optional[threading.Event] = None) -> Dict[str, Any]:
+                response = self.session.get(
+                    endpoint,
+                    headers=headers,
+                    timeout=call_timeout(deadline, 30, "polling status")
+                )
+                response.raise_for_status()
+                
+                return response.json()
+            
+            if self.hedge is not None:
+                return self.hedge.run("get_request_status", attempt)
+            return attempt()
+        
+        with tracing.span("client.get_request_status", request_id=request_id):
+            try:
+                for api_key in api_keys[:-1]:
+                    try:
+                        result = poll(api_key)
+                    except requests.exceptions.HTTPError as e:
+                        if e.response is not None and e.response.status_code in (401, 403, 404):
+                            continue  # Not this account's request
+                        raise
+                    self._remember_key(request_id, api_key)
+                    return result
+                return poll(api_keys[-1])
+                
+            except requests.exceptions.RequestException as e:
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(f"Deadline exceeded polling status: {str(e)}")
+                raise RuntimeError(f"FAL.ai API error: {str(e)}")
+    
+    def reserve_memory(self, count: int = 1, deadline: Optional[Deadline] = None) -> List[Reservation]:
+        """
+        Reserve room in the memory budget for buffered images
+        
+        Args:
+            count: Number of images, reserved together
+            deadline: Overall deadline bounding the wait
+        
+        Returns:
+            One reservation per image, to pass to downloads and release once
+            the image is stored (empty when the client has no memory budget)
+        """
+        if self.memory_budget is None:
+            return []
+        with tracing.span("client.reserve_memory", count=count) as trace:
+            reservations = self.memory_budget.reserve(
+                count, timeout=deadline.remaining() if deadline is not None else None
             )
+            if reservations is None:
+                raise DeadlineExceeded("Deadline exceeded waiting for download memory")
+            trace.set(used_bytes=self.memory_budget.used)
+            return reservations
+    
+    def _read_image(
+        self,
+        image_url: str,
+        cancelled: Optional[threading.Event] = None,
+        deadline: Optional[Deadline] = None,
+        reservation: Optional[Reservation] = None
+    ) -> bytes:
+        """Read a whole image into memory, giving up early once cancelled is set or the deadline passes"""
+        with self.session.get(image_url, timeout=call_timeout(deadline, 30, "downloading"), stream=True) as response:
             response.raise_for_status()
+            if reservation is not None and response.headers.get("Content-Length", "").isdigit():
+                reservation.fit(int(response.headers["Content-Length"]))
             
-            return response.json()
-            
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"FAL.ai API error: {str(e)}")
+            data = bytearray()
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if cancelled is not None and cancelled.is_set():
+                    raise RuntimeError("Download abandoned after a hedged request won")
+                if deadline is not None:
+                    deadline.check("download completed")
+                data.extend(chunk)
+                if reservation is not None:
+                    reservation.fit(len(data))
+            if reservation is not None:
+                reservation.settle(len(data))
+            return bytes(data)
+    
+    def fetch_image(
+        self,
+        image_url: str,
+        deadline: Optional[Deadline] = None,
+        reservation: Optional[Reservation] = None
+    ) -> bytes:
+        """
+        Fetch generated image bytes from URL without saving them
+        
+        Args:
+            image_url: URL of the image to fetch
+            deadline: Overall deadline bounding the download
+            reservation: Memory budget reservation grown to the image size
+        
+        Returns:
+            Raw image bytes
+        """
+        with tracing.span("client.fetch_image", url=image_url) as trace:
+            try:
+                if self.hedge is not None:
+                    if reservation is not None:
+                        # Racing bodies are counted separately; the winner's size is settled below
+                        reservation.settle(0)
+                    
+                    def attempt(cancelled: threading.Event) -> bytes:
+                        held = reservation.spawn() if reservation is not None else None
+                        try:
+                            return self._read_image(image_url, cancelled, deadline, held)
+                        finally:
+                            if held is not None:
+                                held.release()
+                    
+                    data = self.hedge.run("download_image", attempt)
+                    if reservation is not None:
+                        reservation.settle(len(data))
+                else:
+                    data = self._read_image(image_url, deadline=deadline, reservation=reservation)
+                
+                trace.set(bytes=len(data))
+                return data
+                
+            except requests.exceptions.RequestException as e:
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(f"Deadline exceeded downloading image: {str(e)}")
+                raise RuntimeError(f"Failed to download image: {str(e)}")
     
-    def download_image(self, image_url: str, output_path: str) -> str:
+    def download_to_storage(
+        self,
+        image_url: str,
+        storage: AssetStorage,
+        key: str,
+        buffer: Optional[bytearray] = None,
+        deadline: Optional[Deadline] = None,
+        sizes: Optional[List[int]] = None,
+        reservation: Optional[Reservation] = None
+    ) -> str:
+        """
+        Stream a generated image straight into a storage backend
+        
+        Args:
+            image_url: URL of the image to download
+            storage: Destination backend
+            key: Asset key relative to the backend root
+            buffer: Optional bytearray that receives a copy of the bytes as they
+                stream, for post-processing without re-reading the stored file
+            deadline: Overall deadline bounding the download
+            sizes: Optional list that receives the number of bytes stored
+            reservation: Memory budget reservation grown to the bytes received,
+                for callers that keep the image in memory (buffer, or a
+                write-behind backend)
+        
+        Returns:
+            Location reported by the backend
+        """
+        if self.hedge is not None:
+            # Hedged attempts race, so only the winner's bytes may reach storage
+            data = self.fetch_image(image_url, deadline, reservation)
+            if buffer is not None:
+                buffer.extend(data)
+            location = storage.write_bytes(key, data)
+            if sizes is not None:
+                sizes.append(len(data))
+            return location
+        
+        with tracing.span("client.download_image", url=image_url, key=key) as trace:
+            try:
+                timeout = call_timeout(deadline, 30, "downloading")
+                with self.session.get(image_url, timeout=timeout, stream=True) as response:
+                    response.raise_for_status()
+                    if reservation is not None and response.headers.get("Content-Length", "").isdigit():
+                        reservation.fit(int(response.headers["Content-Length"]))
+                    
+                    size = 0
+                    
+                    def chunks():
+                        nonlocal size
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            if deadline is not None:
+                                deadline.check("download completed")
+                            size += len(chunk)
+                            if reservation is not None:
+                                reservation.fit(size)
+                            if buffer is not None:
+                                buffer.extend(chunk)
+                            yield chunk
+                    
+                    location = storage.write_stream(key, chunks())
+                    if reservation is not None:
+                        reservation.settle(size)
+                
+                trace.set(bytes=size)
+                if sizes is not None:
+                    sizes.append(size)
+                return location
+                
+            except requests.exceptions.RequestException as e:
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(f"Deadline exceeded downloading image: {str(e)}")
+                raise RuntimeError(f"Failed to download image: {str(e)}")
+    
+    def download_image(
+        self,
+        image_url: str,
+        output_path: str,
+        deadline: Optional[Deadline] = None
+    ) -> str:
         """
         Download generated image from URL
         
+        The image is written through the client's storage like generated
+        assets are: the directory is created once and remembered, and the
+        bytes land in a temp file that is renamed into place, so an existing
+        file is never overwritten. With a write-behind backend the call waits
+        for the write (and its durability mode) unless it runs inside
+        storage.deferred_flush(), where the caller flushes.
+        
         Args:
             image_url: URL of the image to download
             output_path: Path where to save the image
+            deadline: Overall deadline bounding the download
         
         Returns:
-            Path to saved image
+            Location of the saved image (the path, for local backends)
+        
+        Raises:
+            FileExistsError: If output_path already exists
         """
+        # Hedged downloads and write-behind backends hold whole bodies; plain ones stream a chunk at a time
+        buffered = self.hedge is not None or self.storage.buffers_writes
+        reservations = self.reserve_memory(1, deadline) if buffered else []
         try:
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-            
-            # Create directory if it doesn't exist
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-            
-            # Save image
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
-            
-            return output_path
-            
-        except requests.exceptions.RequestException as e:
-            raise RuntimeError(f"Failed to download image: {str(e)}")
+            location = self.download_to_storage(
+                image_url,
+                self.storage,
+                str(output_path),
+                deadline=deadline,
+                reservation=reservations[0] if reservations else None
+            )
+            if not flush_is_deferred():
+                self.storage.flush([location])
+            return location
+        finally:
+            for reservation in reservations:
+                reservation.release()
 
 
 class CreativeAssetGenerator:
     """High-level interface for generating creative assets with nanobanana pro"""
     
-    def __init__(self, api_key: Optional[str] = None, output_dir: str = "./assets"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        output_dir: str = "./assets",
+        storage: Optional[AssetStorage] = None,
+        renditions: Optional[RenditionPipeline] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        hedge: Optional[HedgePolicy] = None,
+        client: Optional[NanobananProClient] = None,
+        near_duplicates: Optional[PerceptualIndex] = None,
+        memory_budget: Optional[MemoryBudget] = None
+    ):
         """
         Initialize creative asset generator
         
         Args:
             api_key: FAL.ai API key
             output_dir: Base directory for saving assets
+            storage: Where downloaded images are written (defaults to LocalStorage
+                on output_dir). Asset paths are passed as keys relative to output_dir.
+            renditions: Optional post-processing pipeline run on product photos and
+                social graphics right after each download
+            limiter: Optional adaptive concurrency limiter for the API client
+            hedge: Optional hedging policy for status polls and downloads
+            client: Existing API client to share (api_key, limiter, hedge and
+                memory_budget are then ignored)
+            near_duplicates: Optional perceptual-hash index; product photos and
+                social graphics that look like an indexed image are flagged
+                or, in "skip" mode, not stored
+            memory_budget: Optional cap on image bytes buffered in memory
+                (see NanobananProClient)
         """
-        self.client = NanobananProClient(api_key)
+        self.client = client or NanobananProClient(
+            api_key, limiter=limiter, hedge=hedge, memory_budget=memory_budget
+        )
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if storage is None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            storage = LocalStorage(self.output_dir)
+        self.storage = storage
+        self.renditions = renditions
+        self.near_duplicates = near_duplicates
+    
+    def _save_images(
+        self,
+        images: List[Dict[str, Any]],
+        directory: Path,
+        stem: str,
+        ext: str,
+        render: bool = False,
+        prune: bool = False,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Download generated images into a directory
+        
+        Args:
+            images: Image entries from the API response
+            directory: Directory to save into
+            stem: Filename prefix (variation number, timestamp and a unique
+                suffix are appended so concurrent generations never collide)
+            ext: File extension
+            render: Produce derived renditions if a pipeline is configured
+            prune: Check images against the near-duplicate index if configured
+            deadline: Overall deadline for the downloads
+        
+        Returns:
+            Dictionary with "saved_paths", "saved_bytes" (total size), when
+            rendering "renditions" mapping each saved path to {rendition name: location},
+            and when pruning "near_duplicates" listing images that matched the index
+        """
+        render = render and self.renditions is not None
+        prune = prune and self.near_duplicates is not None
+        # Only images held in memory count against the budget; plain streaming keeps one chunk,
+        # while hedged downloads read whole bodies (up to two per image)
+        buffered = render or prune or self.storage.buffers_writes or self.client.hedge is not None
+        # Reserved together up front: holding some while waiting for more could deadlock workers
+        reservations = self.client.reserve_memory(len(images), deadline) if buffered else []
+        try:
+            saved_paths = []
+            sizes = []
+            pending = []
+            duplicates = []
+            for i, image_data in enumerate(images):
+                image_url = image_data.get("url")
+                if image_url:
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    unique = uuid.uuid4().hex[:12]
+                    filepath = directory / f"{stem}_{i+1}_{timestamp}_{unique}.{ext}"
+                    key = filepath.relative_to(self.output_dir).as_posix()
+                    reservation = reservations[i] if reservations else None
+                    
+                    if prune:
+                        # Hash before storing so skipped duplicates never reach storage
+                        buffer = self.client.fetch_image(image_url, deadline, reservation)
+                        value, duplicate = self.near_duplicates.check(buffer)
+                        if duplicate is not None and self.near_duplicates.mode == "skip":
+                            duplicates.append(dict(duplicate, image=image_url, skipped=True))
+                            continue
+                        location = self.storage.write_bytes(key, buffer)
+                        sizes.append(len(buffer))
+                        if duplicate is None:
+                            self.near_duplicates.add(value, location)
+                        else:
+                            duplicates.append(dict(duplicate, image=location, skipped=False))
+                    else:
+                        buffer = bytearray() if render else None
+                        location = self.client.download_to_storage(
+                            image_url, self.storage, key, buffer, deadline=deadline, sizes=sizes,
+                            reservation=reservation
+                        )
+                    saved_paths.append(location)
+                    
+                    # Render in the pool while the next image downloads
+                    if render:
+                        pending.append((location, filepath, self.renditions.submit(bytes(buffer))))
+            
+            saved = {"saved_paths": saved_paths, "saved_bytes": sum(sizes)}
+            if prune:
+                saved["near_duplicates"] = duplicates
+            written = list(saved_paths)
+            if render:
+                saved["renditions"] = {
+                    location: self._save_renditions(filepath, future)
+                    for location, filepath, future in pending
+                }
+                for outputs in saved["renditions"].values():
+                    written += [location for name, location in outputs.items() if name != "error"]
+            
+            # Write-behind backends return before the files land; report only what exists,
+            # unless a batch flushes results itself (see storage.deferred_flush)
+            if not flush_is_deferred():
+                self.storage.flush(written)
+            return saved
+        finally:
+            for reservation in reservations:
+                reservation.release()
+    
+    def _save_renditions(self, filepath: Path, future) -> Dict[str, str]:
+        """Store finished renditions next to their source under renditions/"""
+        with tracing.span("generator.save_renditions", source=filepath.name) as trace:
+            try:
+                outputs = future.result()
+            except Exception as e:
+                trace.set(error=str(e))
+                return {"error": str(e)}
+            
+            saved = {}
+            for name, ext, data in outputs:
+                rendition_path = filepath.parent / "renditions" / f"{filepath.stem}_{name}.{ext}"
+                key = rendition_path.relative_to(self.output_dir).as_posix()
+                saved[name] = self.storage.write_bytes(key, data)
+            
+            trace.set(rendition_count=len(saved))
+            return saved
     
     def generate_product_photo(
         self,
@@ -186,7 +797,8 @@ class CreativeAssetGenerator:
         num_images: int = 1,
         aspect_ratio: str = "1:1",
         resolution: str = "2K",
-        save: bool = True
+        save: bool = True,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate product photography
@@ -198,40 +810,35 @@ class CreativeAssetGenerator:
             aspect_ratio: Image aspect ratio
             resolution: Image resolution
             save: Whether to save images to disk
+            deadline: Overall deadline for generation and downloads
         
         Returns:
             Dictionary with image URLs and metadata
         """
         
-        # Create product directory
-        product_dir = self.output_dir / "product-photography" / product_name.lower().replace(" ", "-")
-        product_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate images
-        result = self.client.generate_image(
-            prompt=prompt,
-            num_images=num_images,
-            aspect_ratio=aspect_ratio,
-            resolution=resolution,
-            output_format="png"
-        )
-        
-        # Download and save images
-        if save and "images" in result:
-            saved_paths = []
-            for i, image_data in enumerate(result["images"]):
-                image_url = image_data.get("url")
-                if image_url:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"{product_name.lower().replace(' ', '_')}_{i+1}_{timestamp}.png"
-                    filepath = product_dir / filename
-                    
-                    self.client.download_image(image_url, str(filepath))
-                    saved_paths.append(str(filepath))
+        with tracing.span("generator.generate_product_photo", product_name=product_name, num_images=num_images, resolution=resolution) as trace:
+            # Product directory
+            product_dir = self.output_dir / "product-photography" / product_name.lower().replace(" ", "-")
             
-            result["saved_paths"] = saved_paths
-        
-        return result
+            # Generate images
+            result = self.client.generate_image(
+                prompt=prompt,
+                num_images=num_images,
+                aspect_ratio=aspect_ratio,
+                resolution=resolution,
+                output_format="png",
+                deadline=deadline
+            )
+            
+            # Download and save images
+            if save and "images" in result:
+                result.update(self._save_images(
+                    result["images"], product_dir, product_name.lower().replace(' ', '_'), "png",
+                    render=True, prune=True, deadline=deadline
+                ))
+                trace.set(saved_count=len(result["saved_paths"]))
+                
+            return result
     
     def generate_social_graphic(
         self,
@@ -241,7 +848,8 @@ class CreativeAssetGenerator:
         num_images: int = 1,
         aspect_ratio: str = "1:1",
         resolution: str = "2K",
-        save: bool = True
+        save: bool = True,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate social media graphics
@@ -254,40 +862,35 @@ class CreativeAssetGenerator:
             aspect_ratio: Image aspect ratio
             resolution: Image resolution
             save: Whether to save images
+            deadline: Overall deadline for generation and downloads
         
         Returns:
             Dictionary with image URLs and metadata
         """
         
-        # Create social directory
-        social_dir = self.output_dir / "social-graphics" / platform.lower()
-        social_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate images
-        result = self.client.generate_image(
-            prompt=prompt,
-            num_images=num_images,
-            aspect_ratio=aspect_ratio,
-            resolution=resolution,
-            output_format="png"
-        )
-        
-        # Download and save images
-        if save and "images" in result:
-            saved_paths = []
-            for i, image_data in enumerate(result["images"]):
-                image_url = image_data.get("url")
-                if image_url:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"{platform}_{topic.lower().replace(' ', '_')}_{i+1}_{timestamp}.png"
-                    filepath = social_dir / filename
-                    
-                    self.client.download_image(image_url, str(filepath))
-                    saved_paths.append(str(filepath))
+        with tracing.span("generator.generate_social_graphic", platform=platform, topic=topic, num_images=num_images, resolution=resolution) as trace:
+            # Social directory
+            social_dir = self.output_dir / "social-graphics" / platform.lower()
             
-            result["saved_paths"] = saved_paths
-        
-        return result
+            # Generate images
+            result = self.client.generate_image(
+                prompt=prompt,
+                num_images=num_images,
+                aspect_ratio=aspect_ratio,
+                resolution=resolution,
+                output_format="png",
+                deadline=deadline
+            )
+            
+            # Download and save images
+            if save and "images" in result:
+                result.update(self._save_images(
+                    result["images"], social_dir, f"{platform}_{topic.lower().replace(' ', '_')}", "png",
+                    render=True, prune=True, deadline=deadline
+                ))
+                trace.set(saved_count=len(result["saved_paths"]))
+                
+            return result
     
     def generate_brand_asset(
         self,
@@ -297,7 +900,8 @@ class CreativeAssetGenerator:
         num_images: int = 1,
         aspect_ratio: str = "1:1",
         resolution: str = "2K",
-        save: bool = True
+        save: bool = True,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate brand assets (logos, icons, patterns)
@@ -310,40 +914,35 @@ class CreativeAssetGenerator:
             aspect_ratio: Image aspect ratio
             resolution: Image resolution
             save: Whether to save images
+            deadline: Overall deadline for generation and downloads
         
         Returns:
             Dictionary with image URLs and metadata
         """
         
-        # Create brand directory
-        brand_dir = self.output_dir / "brand-assets" / brand_name.lower().replace(" ", "-") / asset_type.lower()
-        brand_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate images
-        result = self.client.generate_image(
-            prompt=prompt,
-            num_images=num_images,
-            aspect_ratio=aspect_ratio,
-            resolution=resolution,
-            output_format="png"
-        )
-        
-        # Download and save images
-        if save and "images" in result:
-            saved_paths = []
-            for i, image_data in enumerate(result["images"]):
-                image_url = image_data.get("url")
-                if image_url:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"{asset_type}_{i+1}_{timestamp}.png"
-                    filepath = brand_dir / filename
-                    
-                    self.client.download_image(image_url, str(filepath))
-                    saved_paths.append(str(filepath))
+        with tracing.span("generator.generate_brand_asset", brand_name=brand_name, asset_type=asset_type, num_images=num_images, resolution=resolution) as trace:
+            # Brand directory
+            brand_dir = self.output_dir / "brand-assets" / brand_name.lower().replace(" ", "-") / asset_type.lower()
             
-            result["saved_paths"] = saved_paths
-        
-        return result
+            # Generate images
+            result = self.client.generate_image(
+                prompt=prompt,
+                num_images=num_images,
+                aspect_ratio=aspect_ratio,
+                resolution=resolution,
+                output_format="png",
+                deadline=deadline
+            )
+            
+            # Download and save images
+            if save and "images" in result:
+                result.update(self._save_images(
+                    result["images"], brand_dir, asset_type, "png",
+                    deadline=deadline
+                ))
+                trace.set(saved_count=len(result["saved_paths"]))
+                
+            return result
     
     def generate_custom(
         self,
@@ -355,7 +954,9 @@ class CreativeAssetGenerator:
         resolution: str = "2K",
         output_format: str = "png",
         enable_web_search: bool = False,
-        save: bool = True
+        save: bool = True,
+        seed: Optional[int] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
         Generate custom asset with full control
@@ -370,39 +971,36 @@ class CreativeAssetGenerator:
             output_format: Output format (png, jpeg, webp)
             enable_web_search: Enable Google Search integration
             save: Whether to save images
+            seed: Random seed for reproducible generations
+            deadline: Overall deadline for generation and downloads
         
         Returns:
             Dictionary with image URLs and metadata
         """
         
-        # Create directory
-        asset_dir = self.output_dir / asset_category.lower() / asset_name.lower().replace(" ", "-")
-        asset_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate images
-        result = self.client.generate_image(
-            prompt=prompt,
-            num_images=num_images,
-            aspect_ratio=aspect_ratio,
-            resolution=resolution,
-            output_format=output_format,
-            enable_web_search=enable_web_search
-        )
-        
-        # Download and save images
-        if save and "images" in result:
-            saved_paths = []
-            for i, image_data in enumerate(result["images"]):
-                image_url = image_data.get("url")
-                if image_url:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    ext = output_format if output_format in ["png", "jpeg", "webp"] else "png"
-                    filename = f"{asset_name.lower().replace(' ', '_')}_{i+1}_{timestamp}.{ext}"
-                    filepath = asset_dir / filename
-                    
-                    self.client.download_image(image_url, str(filepath))
-                    saved_paths.append(str(filepath))
+        with tracing.span("generator.generate_custom", asset_category=asset_category, asset_name=asset_name, num_images=num_images, resolution=resolution) as trace:
+            # Asset directory
+            asset_dir = self.output_dir / asset_category.lower() / asset_name.lower().replace(" ", "-")
             
-            result["saved_paths"] = saved_paths
-        
-        return result
+            # Generate images
+            result = self.client.generate_image(
+                prompt=prompt,
+                num_images=num_images,
+                aspect_ratio=aspect_ratio,
+                resolution=resolution,
+                output_format=output_format,
+                enable_web_search=enable_web_search,
+                seed=seed,
+                deadline=deadline
+            )
+            
+            # Download and save images
+            if save and "images" in result:
+                ext = output_format if output_format in ["png", "jpeg", "webp"] else "png"
+                result.update(self._save_images(
+                    result["images"], asset_dir, asset_name.lower().replace(' ', '_'), ext,
+                    deadline=deadline
+                ))
+                trace.set(saved_count=len(result["saved_paths"]))
+                
+            return result
@@ -0,0 +1,189 @@
+"""
+Request Hedging Module
+Tail-latency hedging for idempotent calls (status polls and image downloads)
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, TypeVar
+
+import tracing
+
+T = TypeVar("T")
+
+
+class HedgePolicy:
+    """
+    Fires a duplicate of a slow idempotent request and keeps the first answer
+
+    The hedge delay is the given percentile of recently observed latencies for
+    the same operation, clamped to [min_delay, max_delay]. Extra load is capped
+    by a token budget: every primary request earns max_extra_ratio tokens and
+    each hedge spends one, so hedges never exceed that share of traffic.
+
+    Attempt callables receive a threading.Event that is set once the other
+    attempt has won; long-running attempts (streaming downloads) should check
+    it and abandon their work. Latency and the hedge delay are measured from
+    when an attempt starts running, so time queued for a thread never reads
+    as a slow request.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        max_delay: float = 10.0,
+        initial_delay: float = 2.0,
+        max_extra_ratio: float = 0.1,
+        min_samples: int = 20,
+        window: int = 500,
+        max_workers: int = 16
+    ):
+        """
+        Initialize the policy
+
+        Args:
+            percentile: Latency percentile after which a hedge is sent (0-1)
+            min_delay: Lower bound on the hedge delay in seconds
+            max_delay: Upper bound on the hedge delay in seconds
+            initial_delay: Delay used until min_samples latencies are known
+            max_extra_ratio: Maximum hedges as a fraction of primary requests
+            min_samples: Samples needed before the percentile is trusted
+            window: Latency samples kept per operation
+            max_workers: Threads available for running attempts (grown by
+                size_for() to cover the callers' concurrency)
+        """
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.max_extra_ratio = max_extra_ratio
+        self.min_samples = min_samples
+        self.window = window
+        self.max_workers = max_workers
+
+        self._samples: Dict[str, deque] = {}
+        self._tokens = 1.0
+        self._counts = {"requests": 0, "hedged": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def size_for(self, concurrency: int) -> None:
+        """
+        Make room for `concurrency` callers at once, each with a primary and a hedge
+
+        Args:
+            concurrency: Most requests run through the policy at the same time
+                (e.g. the client's limiter max_limit)
+        """
+        with self._lock:
+            if 2 * concurrency <= self.max_workers:
+                return
+            self.max_workers = 2 * concurrency
+            previous = self._executor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hedge")
+        # Attempts already queued on the old pool still run
+        previous.shutdown(wait=False)
+
+    def delay(self, operation: str) -> float:
+        """Current hedge delay for an operation"""
+        with self._lock:
+            samples = self._samples.get(operation)
+            if not samples or len(samples) < self.min_samples:
+                return self.initial_delay
+            ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def _record(self, operation: str, latency: float) -> None:
+        with self._lock:
+            samples = self._samples.get(operation)
+            if samples is None:
+                samples = self._samples[operation] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def _take_token(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self._counts["hedged"] += 1
+                return True
+            return False
+
+    def run(self, operation: str, attempt: Callable[[threading.Event], T]) -> T:
+        """
+        Run an idempotent attempt, hedging it if it is slow
+
+        Args:
+            operation: Name used to group latency samples
+            attempt: Callable performing the request; receives a cancel event
+
+        Returns:
+            Result of whichever attempt finished first successfully
+        """
+        with self._lock:
+            self._counts["requests"] += 1
+            self._tokens = min(10.0, self._tokens + self.max_extra_ratio)
+
+        cancels = [threading.Event(), threading.Event()]
+        began = [0.0, 0.0]
+        primary_began = threading.Event()
+
+        def timed(index: int) -> T:
+            began[index] = time.monotonic()
+            if index == 0:
+                primary_began.set()
+            return attempt(cancels[index])
+
+        with self._lock:
+            executor = self._executor
+        primary = executor.submit(contextvars.copy_context().run, timed, 0)
+
+        # The hedge delay counts from when the primary starts, not from when it was queued
+        primary_began.wait()
+        remaining = began[0] + self.delay(operation) - time.monotonic()
+        done, _ = wait([primary], timeout=max(0.0, remaining))
+        if done or not self._take_token():
+            try:
+                return primary.result()
+            finally:
+                self._record(operation, time.monotonic() - began[0])
+
+        with tracing.span("hedge.fire", operation=operation):
+            hedge = executor.submit(contextvars.copy_context().run, timed, 1)
+
+        futures = [primary, hedge]
+        pending = set(futures)
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # Tell the loser to stop streaming
+                    for other, cancel in zip(futures, cancels):
+                        if other is not future:
+                            cancel.set()
+                    self._record(operation, time.monotonic() - began[futures.index(future)])
+                    if future is hedge:
+                        with self._lock:
+                            self._counts["hedge_wins"] += 1
+                    return future.result()
+                if first_error is None:
+                    first_error = future.exception()
+
+        raise first_error
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counts of primary requests, hedges sent and hedges that won"""
+        with self._lock:
+            return dict(self._counts)
+
+    def close(self) -> None:
+        """Shut down the attempt threads"""
+        self._executor.shutdown(wait=False)
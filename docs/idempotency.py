@@ -0,0 +1,116 @@
+"""
+Idempotency Module
+Deterministic idempotency keys for generation submits and a local journal of
+key -> request ID, so retries and resumed batches re-attach to an existing
+upstream request instead of paying for a second generation
+"""
+
+import contextvars
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator
+
+_namespace: contextvars.ContextVar = contextvars.ContextVar("idempotency_namespace", default=None)
+
+
+@contextmanager
+def namespace(value: Optional[str]) -> Iterator[None]:
+    """
+    Make submits inside the block use deterministic keys
+
+    The namespace identifies one logical unit of work that may be retried or
+    resumed (e.g. a batch task). Submits outside any namespace get a random
+    key per call, so deliberately repeating a prompt still generates anew.
+
+    Args:
+        value: Namespace string (None leaves the current one in place)
+    """
+    if value is None:
+        yield
+        return
+    token = _namespace.set(value)
+    try:
+        yield
+    finally:
+        _namespace.reset(token)
+
+
+def current_namespace() -> Optional[str]:
+    """Namespace active in this context, if any"""
+    return _namespace.get()
+
+
+def idempotency_key(payload: Dict[str, Any], scope: Optional[str] = None) -> str:
+    """
+    Key for one submission
+
+    Args:
+        payload: Request body
+        scope: Namespace; a random one is used when None
+
+    Returns:
+        Hex digest of the namespace and the canonical payload
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    scope = scope if scope is not None else uuid.uuid4().hex
+    return hashlib.sha256(f"{scope}\n{canonical}".encode()).hexdigest()
+
+
+class SubmitJournal:
+    """
+    SQLite record of idempotency key -> upstream request ID
+
+    Entries older than ttl are ignored and purged, since the provider only
+    keeps results for a limited time. The database can be shared between
+    processes and hosts (and with a batch_runner work queue file); it uses
+    SQLite's rollback journal, since WAL mode needs shared memory on a
+    single host.
+    """
+
+    def __init__(self, path: str, ttl: float = 24 * 3600):
+        """
+        Open (and create if needed) a journal
+
+        Args:
+            path: SQLite database file
+            ttl: Seconds a recorded request ID stays usable
+        """
+        self.path = path
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        # Not WAL: its shared-memory index does not work across hosts or network filesystems
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS submits (
+                key TEXT PRIMARY KEY,
+                request_id TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self.conn.execute("DELETE FROM submits WHERE created < ?", (time.time() - ttl,))
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Request ID recorded for a key, if still within the TTL"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT request_id FROM submits WHERE key = ? AND created >= ?",
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(self, key: str, request_id: str) -> None:
+        """Remember the request ID a key was accepted as"""
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO submits (key, request_id, created) VALUES (?, ?, ?)",
+                (key, request_id, time.time())
+            )
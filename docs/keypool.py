@@ -0,0 +1,219 @@
+"""
+API Key Pool Module
+Spreads generation submits across several FAL.ai accounts with per-key rate
+limits, health tracking and least-loaded selection
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Optional, List, Dict, Any
+
+
+class _KeyState:
+    """Counters for one key (guarded by the pool's condition)"""
+
+    __slots__ = (
+        "key", "fingerprint", "in_flight", "tokens", "refilled_at", "failures",
+        "unhealthy_until", "requests", "throttled", "errors"
+    )
+
+    def __init__(self, key: str, burst: float):
+        self.key = key
+        self.fingerprint = hashlib.sha256(key.encode()).hexdigest()[:12]
+        self.in_flight = 0
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.failures = 0
+        self.unhealthy_until = 0.0
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+
+class KeyPool:
+    """
+    Pool of API keys used by one client
+
+    Each submit takes the healthy key with the fewest requests in flight
+    that still has rate budget (a token bucket refilled at `rate` requests
+    per second, up to `burst`) and is under `max_in_flight`. A 429 rests a
+    key for `throttle_cooldown` seconds; an authentication error (401/403)
+    takes it out for `auth_cooldown`; `max_failures` consecutive 5xx or
+    transport errors rest it for `failure_cooldown`.
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        throttle_cooldown: float = 10.0,
+        failure_cooldown: float = 30.0,
+        auth_cooldown: float = 3600.0,
+        max_failures: int = 3
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            keys: FAL.ai API keys (duplicates are ignored)
+            rate: Requests per second allowed per key (None for unlimited)
+            burst: Token bucket size per key (defaults to max(1, rate))
+            max_in_flight: Concurrent requests allowed per key (None for unlimited)
+            throttle_cooldown: Seconds a key rests after a 429
+            failure_cooldown: Seconds a key rests after max_failures errors in a row
+            auth_cooldown: Seconds a key is skipped after a 401/403
+            max_failures: Consecutive errors before a key is rested
+        """
+        keys = list(dict.fromkeys(key.strip() for key in keys if key and key.strip()))
+        if not keys:
+            raise ValueError("KeyPool needs at least one API key")
+
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate or 1.0)
+        self.max_in_flight = max_in_flight
+        self.throttle_cooldown = throttle_cooldown
+        self.failure_cooldown = failure_cooldown
+        self.auth_cooldown = auth_cooldown
+        self.max_failures = max_failures
+
+        self._states = [_KeyState(key, self.burst) for key in keys]
+        self._by_key = {state.key: state for state in self._states}
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_env(cls, variable: str = "FAL_API_KEYS", **options) -> Optional["KeyPool"]:
+        """
+        Pool from a comma-separated environment variable
+
+        Args:
+            variable: Environment variable holding the keys
+            **options: KeyPool options
+
+        Returns:
+            KeyPool, or None if the variable is unset or empty
+        """
+        value = os.getenv(variable, "")
+        keys = [key for key in value.split(",") if key.strip()]
+        return cls(keys, **options) if keys else None
+
+    @property
+    def keys(self) -> List[str]:
+        return [state.key for state in self._states]
+
+    def _refill(self, state: _KeyState, now: float) -> None:
+        if self.rate is None:
+            return
+        state.tokens = min(self.burst, state.tokens + (now - state.refilled_at) * self.rate)
+        state.refilled_at = now
+
+    def _available(self, state: _KeyState, now: float) -> bool:
+        if self.max_in_flight is not None and state.in_flight >= self.max_in_flight:
+            return False
+        return self.rate is None or state.tokens >= 1
+
+    def _next_change(self, now: float) -> Optional[float]:
+        """Seconds until a rested key recovers or a token refills"""
+        waits = [state.unhealthy_until - now for state in self._states if state.unhealthy_until > now]
+        if self.rate is not None:
+            waits += [(1 - state.tokens) / self.rate for state in self._states if state.tokens < 1]
+        return max(0.01, min(waits)) if waits else None
+
+    def acquire(self, timeout: Optional[float] = None, key: Optional[str] = None) -> Optional[str]:
+        """
+        Take a key for one request
+
+        Args:
+            timeout: Maximum seconds to wait (None waits indefinitely)
+            key: Use this key (e.g. to retry where the request may have landed)
+
+        Returns:
+            The key, or None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                for state in self._states:
+                    self._refill(state, now)
+
+                if key is not None:
+                    candidates = [self._by_key[key]]
+                else:
+                    healthy = [state for state in self._states if state.unhealthy_until <= now]
+                    # With every key resting, fall back to all of them rather than stall
+                    candidates = healthy or self._states
+                candidates = [state for state in candidates if self._available(state, now)]
+
+                if candidates:
+                    state = min(candidates, key=lambda s: (s.in_flight, s.requests))
+                    state.in_flight += 1
+                    state.requests += 1
+                    if self.rate is not None:
+                        state.tokens -= 1
+                    return state.key
+
+                wait = self._next_change(now)
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+
+    def release(self, key: str, status_code: Optional[int] = None, error: bool = False) -> None:
+        """
+        Return a key and record the outcome
+
+        Args:
+            key: Key returned by acquire()
+            status_code: HTTP status, if a response was received
+            error: True for transport failures (leave both unset if the
+                request was never sent)
+        """
+        with self._condition:
+            state = self._by_key[key]
+            state.in_flight -= 1
+            now = time.monotonic()
+
+            if status_code == 429:
+                state.throttled += 1
+                state.unhealthy_until = now + self.throttle_cooldown
+            elif status_code in (401, 403):
+                state.errors += 1
+                state.unhealthy_until = now + self.auth_cooldown
+            elif error or (status_code is not None and status_code >= 500):
+                state.errors += 1
+                state.failures += 1
+                if state.failures >= self.max_failures:
+                    state.failures = 0
+                    state.unhealthy_until = now + self.failure_cooldown
+            elif status_code is not None:
+                state.failures = 0
+
+            self._condition.notify_all()
+
+    def metrics(self) -> List[Dict[str, Any]]:
+        """
+        Per-key state (keys are identified by a fingerprint, never in clear)
+
+        Returns:
+            List of dictionaries with in-flight, request, throttle and error
+            counts and whether the key is currently healthy
+        """
+        now = time.monotonic()
+        with self._condition:
+            return [
+                {
+                    "key": state.fingerprint,
+                    "healthy": state.unhealthy_until <= now,
+                    "in_flight": state.in_flight,
+                    "requests": state.requests,
+                    "throttled": state.throttled,
+                    "errors": state.errors
+                }
+                for state in self._states
+            ]
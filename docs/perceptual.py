@@ -0,0 +1,172 @@
+"""
+Perceptual Hash Module
+Finds visually near-identical images with DCT perceptual hashes so redundant
+variations can be flagged or skipped right after download
+"""
+
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:  # Only needed when near-duplicate pruning is enabled
+    np = None
+    Image = None
+
+HASH_SIZE = 8
+_SAMPLE_SIZE = 32
+_DCT_MATRIX = None
+
+
+def _dct_matrix(n: int):
+    """Orthonormal DCT-II basis, so the 2D transform is two matrix products"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+def perceptual_hash(data: bytes) -> int:
+    """
+    64-bit pHash of an encoded image
+
+    The image is reduced to 32x32 grayscale, transformed with a 2D DCT, and
+    the 8x8 lowest frequencies (minus the DC term) are compared against their
+    median. Resizing, recompression and small edits flip few bits.
+
+    Args:
+        data: Encoded image bytes
+
+    Returns:
+        Hash as an integer
+    """
+    global _DCT_MATRIX
+    if _DCT_MATRIX is None:
+        _DCT_MATRIX = _dct_matrix(_SAMPLE_SIZE)
+
+    with Image.open(io.BytesIO(data)) as image:
+        image.draft("L", (_SAMPLE_SIZE * 4, _SAMPLE_SIZE * 4))  # Fast JPEG downscale on decode
+        pixels = np.asarray(
+            image.convert("L").resize((_SAMPLE_SIZE, _SAMPLE_SIZE), Image.LANCZOS),
+            dtype=np.float64
+        )
+
+    low = (_DCT_MATRIX @ pixels @ _DCT_MATRIX.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])
+    bits[0] = False  # DC term carries overall brightness only
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class PerceptualIndex:
+    """
+    Persistent index of image hashes with Hamming-distance lookup
+
+    Hashes live in a NumPy uint64 array so a lookup compares against every
+    indexed image in one vectorized XOR and popcount. The index is stored as
+    JSON Lines and shared across runs, so variations are also checked against
+    earlier campaigns. Entries whose files were deleted are ignored.
+    """
+
+    def __init__(self, path: str, max_distance: int = 6, mode: str = "flag"):
+        """
+        Open (and create if needed) a hash index
+
+        Args:
+            path: JSON Lines index file
+            max_distance: Largest Hamming distance (of 64 bits) still treated
+                as a near-duplicate
+            mode: "flag" keeps near-duplicates and reports them; "skip" does
+                not store them at all
+        """
+        if np is None or Image is None:
+            raise RuntimeError(
+                "NumPy and Pillow are required for near-duplicate pruning. "
+                "Install them with: pip install numpy Pillow"
+            )
+        if mode not in ("flag", "skip"):
+            raise ValueError('mode must be "flag" or "skip"')
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_distance = max_distance
+        self.mode = mode
+
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._paths: List[str] = []
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            hashes = []
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write from a crashed process
+                    hashes.append(int(entry["hash"], 16))
+                    self._paths.append(entry["path"])
+            self._hashes = np.array(hashes, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def _distances(self, value: int):
+        differing = np.bitwise_xor(self._hashes, np.uint64(value))
+        return np.unpackbits(differing.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+
+    def match(self, value: int) -> Optional[Tuple[str, int]]:
+        """
+        Closest indexed image within max_distance
+
+        Args:
+            value: Perceptual hash
+
+        Returns:
+            (path, distance) or None
+        """
+        with self._lock:
+            if not self._paths:
+                return None
+            distances = self._distances(value)
+            order = np.argsort(distances, kind="stable")
+            candidates = [
+                (self._paths[i], int(distances[i]))
+                for i in order
+                if distances[i] <= self.max_distance
+            ]
+
+        for path, distance in candidates:
+            if "://" in path or os.path.exists(path):
+                return path, distance
+        return None
+
+    def add(self, value: int, path: str) -> None:
+        """Index a stored image"""
+        line = json.dumps({"hash": f"{value:016x}", "path": path}) + "\n"
+        with self._lock:
+            self._hashes = np.append(self._hashes, np.uint64(value))
+            self._paths.append(path)
+            with open(self.path, "a") as f:
+                f.write(line)
+
+    def check(self, data: bytes) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        Hash an image and look for a near-duplicate
+
+        Args:
+            data: Encoded image bytes
+
+        Returns:
+            (hash, {"duplicate_of": path, "distance": bits} or None)
+        """
+        value = perceptual_hash(data)
+        found = self.match(value)
+        if found is None:
+            return value, None
+        return value, {"duplicate_of": found[0], "distance": found[1]}
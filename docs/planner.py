@@ -0,0 +1,344 @@
+"""
+Batch Planner Module
+Looks at a batch as a whole before anything is submitted: normalizes
+specifications, collapses duplicates, groups compatible requests, checks the
+result cache, estimates wall-clock time, spend and request count, and
+admits work within a time or spend budget
+"""
+
+import hashlib
+import heapq
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Iterable
+
+from fal_api import DEFAULT_RESOLUTION_SECONDS, PER_IMAGE_SECONDS, request_seconds
+
+# Price per image (USD) per resolution on FAL.ai; 4K is billed at twice the base rate
+DEFAULT_RESOLUTION_COST = {"1K": 0.15, "2K": 0.15, "4K": 0.30}
+
+# Batch spec type -> (assistant method, [(argument, spec keys tried in order, default)])
+# The defaults mirror the ClaudeCreativeAssistant.generate_* signatures.
+_COMMON_FIELDS = [
+    ("num_variations", ("num_variations",), 1),
+    ("resolution", ("resolution",), "2K"),
+    ("aspect_ratio", ("aspect_ratio",), "1:1"),
+]
+
+_SPEC_FIELDS = {
+    "product": ("generate_product_photo", [
+        ("product_name", ("name",), "product"),
+        ("description", ("description",), ""),
+        ("style", ("style",), "professional photography"),
+        ("lighting", ("lighting",), "studio lighting"),
+        ("background", ("background",), "white background"),
+    ] + _COMMON_FIELDS),
+    "social": ("generate_social_post", [
+        ("platform", ("platform",), "instagram"),
+        ("topic", ("topic", "name"), "post"),
+        ("description", ("description",), ""),
+        ("style", ("style",), "modern design"),
+        ("mood", ("mood",), "professional"),
+    ] + _COMMON_FIELDS),
+    "brand": ("generate_brand_element", [
+        ("brand_name", ("brand_name",), "brand"),
+        ("element_type", ("element_type",), "logo"),
+        ("description", ("description",), ""),
+        ("style", ("style",), "modern"),
+        ("colors", ("colors",), "professional colors"),
+    ] + _COMMON_FIELDS),
+    "custom": ("generate_custom_asset", [
+        ("category", ("category",), "custom"),
+        ("name", ("name",), "asset"),
+        ("prompt", ("prompt", "description"), ""),
+        ("output_format", ("format",), "png"),
+        ("enable_web_search", ("web_search",), False),
+        ("seed", ("seed",), None),
+    ] + _COMMON_FIELDS),
+}
+
+
+def normalize_spec(asset: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resolve a batch specification into the assistant call it stands for
+
+    Args:
+        asset: Batch specification (type, name and type-specific fields)
+
+    Returns:
+        Dictionary with "type", "name", "method" (ClaudeCreativeAssistant
+        method name) and "arguments" with every default filled in
+    """
+    asset_type = asset.get("type", "custom").lower()
+    if asset_type not in _SPEC_FIELDS:
+        asset_type = "custom"
+    method, fields = _SPEC_FIELDS[asset_type]
+
+    arguments = {}
+    for argument, keys, default in fields:
+        value = default
+        for key in keys:
+            if key in asset:
+                value = asset[key]
+                break
+        arguments[argument] = value
+
+    return {
+        "type": asset_type,
+        "name": asset.get("name", "unknown"),
+        "method": method,
+        "arguments": arguments
+    }
+
+
+def request_key(spec: Dict[str, Any]) -> str:
+    """Fingerprint of a normalized specification; equal keys mean identical API requests"""
+    canonical = json.dumps([spec["method"], spec["arguments"]], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def group_label(spec: Dict[str, Any]) -> str:
+    """Requests sharing resolution, aspect ratio and output format are grouped together"""
+    arguments = spec["arguments"]
+    return f"{arguments['resolution']} {arguments['aspect_ratio']} {arguments.get('output_format', 'png')}"
+
+
+@dataclass
+class PlannedItem:
+    """
+    One input specification and what the plan will do with it
+
+    Attributes:
+        index: Position in the batch input
+        asset: Original specification
+        spec: Normalized specification (see normalize_spec)
+        key: Request fingerprint
+        duplicate_of: Index of the identical item whose result is reused
+        cached: Cache entry that satisfies the item without a request
+        deferred: Left out of the run because it does not fit the budget
+    """
+    index: int
+    asset: Dict[str, Any]
+    spec: Dict[str, Any]
+    key: str
+    duplicate_of: Optional[int] = None
+    cached: Optional[Dict[str, Any]] = None
+    deferred: bool = False
+
+    @property
+    def needs_request(self) -> bool:
+        return self.duplicate_of is None and self.cached is None and not self.deferred
+
+
+@dataclass
+class BatchPlan:
+    """
+    Result of planning a batch
+
+    Attributes:
+        items: Planned items in input order
+        groups: Group label -> indices of items that need a request
+        max_workers: Concurrency the estimate assumes
+        estimated_seconds: Estimated wall-clock time for the requests
+        estimated_cost: Estimated spend for the requests
+        budget_seconds: Wall-clock budget the plan was admitted against
+        budget_cost: Spend budget the plan was admitted against
+        order: Submission order chosen by the budget (cheapest first);
+            None submits group by group
+    """
+    items: List[PlannedItem]
+    groups: Dict[str, List[int]] = field(default_factory=dict)
+    max_workers: int = 4
+    estimated_seconds: float = 0.0
+    estimated_cost: float = 0.0
+    budget_seconds: Optional[float] = None
+    budget_cost: Optional[float] = None
+    order: Optional[List[int]] = None
+
+    @property
+    def requests(self) -> List[PlannedItem]:
+        """Items that will call the API, in submission order"""
+        if self.order is not None:
+            return [self.items[index] for index in self.order]
+        return [self.items[index] for indices in self.groups.values() for index in indices]
+
+    @property
+    def deferred(self) -> List[PlannedItem]:
+        """Items left out by the budget, in input order"""
+        return [item for item in self.items if item.deferred]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Dry-run report
+
+        Returns:
+            Dictionary with item, request, duplicate, cache-hit and image
+            counts, per-group request counts, the time and spend estimates,
+            and the budget with every deferred item (index, name, resolution,
+            variations)
+        """
+        requests = self.requests
+        return {
+            "items": len(self.items),
+            "requests": len(requests),
+            "duplicates": sum(1 for item in self.items if item.duplicate_of is not None),
+            "cache_hits": sum(1 for item in self.items if item.cached is not None),
+            "images": sum(item.spec["arguments"]["num_variations"] for item in requests),
+            "groups": {label: len(indices) for label, indices in self.groups.items()},
+            "max_workers": self.max_workers,
+            "estimated_seconds": round(self.estimated_seconds, 1),
+            "estimated_cost": round(self.estimated_cost, 2),
+            "budget_seconds": self.budget_seconds,
+            "budget_cost": self.budget_cost,
+            "deferred": [
+                {
+                    "index": item.index,
+                    "name": item.spec["name"],
+                    "resolution": item.spec["arguments"]["resolution"],
+                    "num_variations": item.spec["arguments"]["num_variations"]
+                }
+                for item in self.deferred
+            ]
+        }
+
+
+def estimate_seconds(spec: Dict[str, Any], resolution_seconds: Optional[Dict[str, float]] = None) -> float:
+    """Estimated duration of one request"""
+    arguments = spec["arguments"]
+    return request_seconds(arguments["resolution"], arguments["num_variations"], resolution_seconds)
+
+
+def estimate_cost(spec: Dict[str, Any], resolution_cost: Optional[Dict[str, float]] = None) -> float:
+    """Estimated spend for one request"""
+    table = resolution_cost or DEFAULT_RESOLUTION_COST
+    arguments = spec["arguments"]
+    return table.get(arguments["resolution"], table.get("2K", 0.15)) * max(1, arguments["num_variations"])
+
+
+def _admit(
+    plan: BatchPlan,
+    seconds: Dict[int, float],
+    costs: Dict[int, float],
+    budget_seconds: Optional[float],
+    budget_cost: Optional[float]
+) -> float:
+    """
+    Admit as many assets as fit the budget, cheapest first
+
+    Requests are ranked by the larger of their shares of the spend budget
+    and of the worker-time budget, divided by the assets they complete (the
+    request itself plus its in-batch duplicates). Each is admitted if the
+    spend still fits and, placed on the earliest free worker, it finishes
+    inside budget_seconds; the rest are deferred along with their
+    duplicates. Returns the simulated wall-clock time of the admitted work.
+    """
+    workers = [0.0] * max(1, plan.max_workers)
+    completes = Counter(item.duplicate_of for item in plan.items if item.duplicate_of is not None)
+
+    def rank(item: PlannedItem) -> tuple:
+        share = 0.0
+        if budget_cost:
+            share = max(share, costs[item.index] / budget_cost)
+        if budget_seconds:
+            share = max(share, seconds[item.index] / (budget_seconds * len(workers)))
+        return (share / (1 + completes[item.index]), item.index)
+
+    spent = 0.0
+    admitted = []
+    for item in sorted(plan.requests, key=rank):
+        duration, cost = seconds[item.index], costs[item.index]
+        if budget_cost is not None and spent + cost > budget_cost:
+            item.deferred = True
+        elif budget_seconds is not None and workers[0] + duration > budget_seconds:
+            item.deferred = True
+        else:
+            heapq.heapreplace(workers, workers[0] + duration)
+            spent += cost
+            admitted.append(item.index)
+
+    for item in plan.items:
+        if item.duplicate_of is not None and plan.items[item.duplicate_of].deferred:
+            item.deferred = True
+
+    plan.groups = {
+        label: kept
+        for label, kept in (
+            (label, [index for index in indices if not plan.items[index].deferred])
+            for label, indices in plan.groups.items()
+        )
+        if kept
+    }
+    plan.order = admitted
+    return max(workers)
+
+
+def plan_batch(
+    assets: Iterable[Dict[str, Any]],
+    max_workers: int = 4,
+    dedupe: bool = True,
+    cache: Any = None,
+    resolution_seconds: Optional[Dict[str, float]] = None,
+    resolution_cost: Optional[Dict[str, float]] = None,
+    budget_seconds: Optional[float] = None,
+    budget_cost: Optional[float] = None
+) -> BatchPlan:
+    """
+    Plan a batch without submitting anything
+
+    Args:
+        assets: Batch specifications (same format as batch_generate)
+        max_workers: Concurrency used for the wall-clock estimate
+        dedupe: Collapse identical requests into one
+        cache: Optional ResultCache to check for previously saved results
+        resolution_seconds: Per-resolution request durations overriding
+            DEFAULT_RESOLUTION_SECONDS
+        resolution_cost: Per-resolution price per image overriding
+            DEFAULT_RESOLUTION_COST
+        budget_seconds: Wall-clock budget at max_workers; requests that would
+            finish later are deferred
+        budget_cost: Spend budget; requests that would exceed it are deferred
+
+    Returns:
+        BatchPlan; with a budget, admitted requests run cheapest first and
+        the rest are listed in plan.deferred
+    """
+    items = []
+    first_by_key: Dict[str, int] = {}
+    groups: Dict[str, List[int]] = {}
+
+    for index, asset in enumerate(assets):
+        spec = normalize_spec(asset)
+        item = PlannedItem(index=index, asset=asset, spec=spec, key=request_key(spec))
+
+        if dedupe and item.key in first_by_key:
+            item.duplicate_of = first_by_key[item.key]
+        elif cache is not None:
+            item.cached = cache.get(item.key)
+
+        first_by_key.setdefault(item.key, index)
+        if item.needs_request:
+            groups.setdefault(group_label(spec), []).append(index)
+        items.append(item)
+
+    plan = BatchPlan(
+        items=items,
+        groups=groups,
+        max_workers=max_workers,
+        budget_seconds=budget_seconds,
+        budget_cost=budget_cost
+    )
+    seconds = {item.index: estimate_seconds(item.spec, resolution_seconds) for item in plan.requests}
+    costs = {item.index: estimate_cost(item.spec, resolution_cost) for item in plan.requests}
+
+    if budget_seconds is not None or budget_cost is not None:
+        plan.estimated_seconds = _admit(plan, seconds, costs, budget_seconds, budget_cost)
+    else:
+        # Greedy list scheduling, longest requests first, onto max_workers slots
+        workers = [0.0] * max(1, max_workers)
+        for duration in sorted((seconds[item.index] for item in plan.requests), reverse=True):
+            heapq.heapreplace(workers, workers[0] + duration)
+        plan.estimated_seconds = max(workers)
+    plan.estimated_cost = sum(costs[item.index] for item in plan.requests)
+
+    return plan
@@ -0,0 +1,192 @@
+"""
+Profiling Module
+CPU profiling, allocation tracking and per-phase wall time for a single run,
+written out as a plain-text report
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+import tracing
+
+
+class PhaseTimer(tracing.TraceHook):
+    """
+    Trace hook that aggregates wall time per span name
+
+    Spans run concurrently in worker threads, so totals can add up to more
+    than the run's elapsed time. With memory=True (and tracemalloc running)
+    the traced memory at the end of each phase is recorded too, along with
+    the highest value seen. A snapshot is taken, outside the lock and by one
+    thread at a time, when that high grows by more than SNAPSHOT_GROWTH over
+    the last snapshot, so spans ending in other threads never wait on it.
+    """
+
+    SNAPSHOT_GROWTH = 0.1
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.high_water = 0
+        self.high_snapshot = None
+        self.high_snapshot_size = 0
+        self._phases: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+
+    def on_end(self, span: tracing.Span) -> None:
+        duration = span.duration or 0.0
+        current = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        with self._lock:
+            phase = self._phases.setdefault(
+                span.name, {"count": 0, "total": 0.0, "max": 0.0, "errors": 0, "memory": 0}
+            )
+            phase["count"] += 1
+            phase["total"] += duration
+            phase["max"] = max(phase["max"], duration)
+            phase["memory"] = max(phase["memory"], current)
+            if span.error:
+                phase["errors"] += 1
+            self.high_water = max(self.high_water, current)
+            snapshot_due = current > self.high_snapshot_size * (1 + self.SNAPSHOT_GROWTH)
+        if snapshot_due and self._snapshot_lock.acquire(blocking=False):
+            try:
+                snapshot = tracemalloc.take_snapshot()
+                with self._lock:
+                    self.high_snapshot = snapshot
+                    self.high_snapshot_size = current
+            finally:
+                self._snapshot_lock.release()
+
+    def phases(self) -> Dict[str, Dict[str, Any]]:
+        """Per-span-name count, total, max, error count and memory, slowest total first"""
+        with self._lock:
+            items = sorted(self._phases.items(), key=lambda item: item[1]["total"], reverse=True)
+            return {name: dict(phase) for name, phase in items}
+
+
+class RunProfiler:
+    """
+    Context manager profiling everything run inside it
+
+    Per-phase wall time is always collected (through a tracing hook). With
+    cpu=True, cProfile records the calling thread; with memory=True,
+    tracemalloc records allocations in every thread.
+    """
+
+    def __init__(self, cpu: bool = True, memory: bool = False, top: int = 25, frames: int = 1):
+        """
+        Initialize the profiler
+
+        Args:
+            cpu: Collect a cProfile profile
+            memory: Track allocations with tracemalloc
+            top: Rows per table in the report
+            frames: Stack frames kept per allocation
+        """
+        self.cpu = cpu
+        self.memory = memory
+        self.top = top
+        self.frames = frames
+
+        self.phases = PhaseTimer(memory=memory)
+        self._profile: Optional[cProfile.Profile] = None
+        self._snapshot = None
+        self._current = 0
+        self._peak = 0
+        self._started_tracemalloc = False
+        self.started_at: Optional[float] = None
+        self.elapsed: Optional[float] = None
+
+    def __enter__(self) -> "RunProfiler":
+        tracing.add_hook(self.phases)
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracemalloc = True
+        if self.cpu:
+            self._profile = cProfile.Profile()
+        self.started_at = time.perf_counter()
+        if self._profile is not None:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self._profile is not None:
+            self._profile.disable()
+        self.elapsed = time.perf_counter() - self.started_at
+        if self.memory:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._current, self._peak = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        tracing.remove_hook(self.phases)
+        return False
+
+    def report(self) -> str:
+        """Text report of the finished run"""
+        lines = [f"Elapsed: {self.elapsed:.3f}s", "", "Phases (wall time)"]
+        phases = self.phases.phases()
+        memory_column = f" {'mem MiB':>8}" if self.memory else ""
+        if phases:
+            lines.append(
+                f"  {'phase':<36} {'count':>6} {'total s':>9} {'mean s':>9} {'max s':>9} {'errors':>6}{memory_column}"
+            )
+            for name, phase in phases.items():
+                memory = f" {phase['memory'] / 1024 / 1024:>8.1f}" if self.memory else ""
+                lines.append(
+                    f"  {name:<36} {phase['count']:>6} {phase['total']:>9.3f} "
+                    f"{phase['total'] / phase['count']:>9.3f} {phase['max']:>9.3f} {phase['errors']:>6}{memory}"
+                )
+        else:
+            lines.append("  (no traced phases)")
+
+        if self._profile is not None:
+            stream = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=stream)
+            stats.sort_stats("cumulative").print_stats(self.top)
+            lines += ["", "Top functions by cumulative time (calling thread)", stream.getvalue().strip()]
+
+        if self._snapshot is not None:
+            lines += ["", f"Peak traced memory: {self._peak / 1024 / 1024:.1f} MiB"]
+            # Closest observed point to the peak: the highest phase end, else exit
+            lines.append(f"Highest traced memory at a phase end: {self.phases.high_water / 1024 / 1024:.1f} MiB")
+            if self.phases.high_snapshot is not None and self.phases.high_snapshot_size > self._current:
+                snapshot = self.phases.high_snapshot
+                label = f"near the highest phase end ({self.phases.high_snapshot_size / 1024 / 1024:.1f} MiB)"
+            else:
+                snapshot = self._snapshot
+                label = f"at exit ({self._current / 1024 / 1024:.1f} MiB)"
+            lines.append(f"Largest allocation sites {label}")
+            for stat in snapshot.statistics("lineno")[:self.top]:
+                frame = stat.traceback[0]
+                lines.append(f"  {stat.size / 1024:>10.1f} KiB {stat.count:>8} blocks  {frame.filename}:{frame.lineno}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, directory: str, name: str = "run") -> Path:
+        """
+        Save the report (and the raw cProfile data, if collected)
+
+        Args:
+            directory: Output directory
+            name: Label used in the file names (e.g. the CLI command)
+
+        Returns:
+            Path of the text report; the .prof file next to it loads with
+            pstats or snakeviz
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"profile-{name}-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        path = directory / f"{stem}.txt"
+        path.write_text(self.report())
+        if self._profile is not None:
+            self._profile.dump_stats(str(directory / f"{stem}.prof"))
+        return path
@@ -0,0 +1,161 @@
+"""
+Renditions Module
+Derives thumbnails, web-optimized copies and platform crops from downloaded images
+in a process pool, working from the in-memory download buffer
+"""
+
+import io
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, List, Tuple
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed when renditions are enabled
+    Image = None
+
+# Workers are started from a multi-threaded process (batch, hedge and writer
+# threads), where fork can deadlock; forkserver where available, else spawn
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+@dataclass(frozen=True)
+class RenditionSpec:
+    """
+    One derived output
+
+    Attributes:
+        name: Rendition name, used in the file name and result dict
+        format: Output format (jpeg or webp)
+        max_edge: Longest edge in pixels after resizing (keeps aspect ratio)
+        size: Exact (width, height); the source is center-cropped to this
+            aspect ratio first. Takes precedence over max_edge.
+        quality: Encoder quality (1-100)
+    """
+    name: str
+    format: str = "jpeg"
+    max_edge: Optional[int] = None
+    size: Optional[Tuple[int, int]] = None
+    quality: int = 85
+
+
+DEFAULT_RENDITIONS = (
+    RenditionSpec("thumbnail", "jpeg", max_edge=320, quality=80),
+    RenditionSpec("web_jpeg", "jpeg", max_edge=1600, quality=82),
+    RenditionSpec("web_webp", "webp", max_edge=1600, quality=80),
+    RenditionSpec("instagram_4x5", "jpeg", size=(1080, 1350), quality=88),
+    RenditionSpec("twitter_16x9", "jpeg", size=(1600, 900), quality=88),
+)
+
+_EXTENSIONS = {"jpeg": "jpg", "webp": "webp"}
+
+
+def _center_crop(image, width: int, height: int):
+    """Crop the largest centered region with the target aspect ratio"""
+    src_w, src_h = image.size
+    target_ratio = width / height
+    if src_w / src_h > target_ratio:
+        crop_w = round(src_h * target_ratio)
+        left = (src_w - crop_w) // 2
+        return image.crop((left, 0, left + crop_w, src_h))
+    crop_h = round(src_w / target_ratio)
+    top = (src_h - crop_h) // 2
+    return image.crop((0, top, src_w, top + crop_h))
+
+
+def render(data: bytes, specs: Tuple[RenditionSpec, ...]) -> List[Tuple[str, str, bytes]]:
+    """
+    Produce renditions from encoded image bytes (runs inside worker processes)
+
+    Args:
+        data: Encoded source image
+        specs: Renditions to produce
+
+    Returns:
+        List of (name, extension, encoded bytes)
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        if source.mode not in ("RGB", "RGBA"):
+            source = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+
+        outputs = []
+        for spec in specs:
+            if spec.size:
+                image = _center_crop(source, *spec.size).resize(spec.size, Image.LANCZOS)
+            else:
+                image = source.copy()
+                if spec.max_edge:
+                    image.thumbnail((spec.max_edge, spec.max_edge), Image.LANCZOS)
+
+            if spec.format == "jpeg" and image.mode != "RGB":
+                image = image.convert("RGB")
+
+            buffer = io.BytesIO()
+            image.save(buffer, format=spec.format.upper(), quality=spec.quality, optimize=True)
+            outputs.append((spec.name, _EXTENSIONS[spec.format], buffer.getvalue()))
+
+        return outputs
+
+
+class RenditionPipeline:
+    """
+    Process pool that renders derived images right after each download
+
+    Workers are started with forkserver (spawn where unavailable), so a
+    script that enables renditions needs the usual
+    `if __name__ == "__main__":` guard. Call close() (or
+    ClaudeCreativeAssistant.close()) to stop them.
+    """
+
+    def __init__(
+        self,
+        specs: Tuple[RenditionSpec, ...] = DEFAULT_RENDITIONS,
+        max_workers: Optional[int] = None
+    ):
+        """
+        Initialize the pipeline
+
+        Args:
+            specs: Renditions to produce for every image
+            max_workers: Worker processes (defaults to the CPU count)
+        """
+        if Image is None:
+            raise RuntimeError("Pillow is required for renditions. Install it with: pip install Pillow")
+
+        for spec in specs:
+            if spec.format not in _EXTENSIONS:
+                raise ValueError(f"Rendition format must be one of {list(_EXTENSIONS)}")
+
+        self.specs = tuple(specs)
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, data: bytes) -> Future:
+        """
+        Queue renditions for one image
+
+        Args:
+            data: Encoded source image
+
+        Returns:
+            Future resolving to a list of (name, extension, encoded bytes)
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(_START_METHOD)
+                )
+            executor = self._executor
+        return executor.submit(render, data, self.specs)
+
+    def close(self) -> None:
+        """Shut down the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
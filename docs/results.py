@@ -0,0 +1,180 @@
+"""
+Results Module
+Compact records for batch results, so large runs do not keep raw API payloads
+and nested result dictionaries alive
+"""
+
+import sys
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+
+
+class AssetResult:
+    """
+    Outcome of one batch item
+
+    Holds only the fields batch consumers use. The full API response is not
+    kept; `raw` fetches it again by request ID on first access. Supports
+    dictionary reads (result["images"], result["platform"], result.get("error"),
+    to_dict()) with the keys the old dict results had, so code reading them
+    keeps working. Unlike those dicts, records are not mutable by key: use
+    copy(**changes) or to_dict() for a modified or extended result.
+    """
+
+    __slots__ = (
+        "success", "asset_name", "images", "request_id", "prompt_used",
+        "resolution", "aspect_ratio", "elapsed", "bytes_written", "error",
+        "skipped", "cached", "index", "renditions", "near_duplicates",
+        "platform", "element_type", "category", "web_search_enabled", "_client", "_raw"
+    )
+
+    _FIELDS = (
+        "success", "asset_name", "images", "request_id", "prompt_used",
+        "resolution", "aspect_ratio", "elapsed", "bytes_written", "error",
+        "skipped", "cached", "index", "renditions", "near_duplicates",
+        "platform", "element_type", "category", "web_search_enabled"
+    )
+
+    def __init__(
+        self,
+        success: bool,
+        asset_name: str = "unknown",
+        images: Tuple[str, ...] = (),
+        request_id: Optional[str] = None,
+        prompt_used: Optional[str] = None,
+        resolution: Optional[str] = None,
+        aspect_ratio: Optional[str] = None,
+        elapsed: float = 0.0,
+        bytes_written: int = 0,
+        error: Optional[str] = None,
+        skipped: bool = False,
+        cached: bool = False,
+        index: Optional[int] = None,
+        renditions: Optional[Dict[str, Dict[str, str]]] = None,
+        near_duplicates: Optional[List[Dict[str, Any]]] = None,
+        platform: Optional[str] = None,
+        element_type: Optional[str] = None,
+        category: Optional[str] = None,
+        web_search_enabled: Optional[bool] = None,
+        client: Any = None
+    ):
+        """
+        Initialize a result record
+
+        Args:
+            success: Whether every image was generated and saved
+            asset_name: Name from the batch specification
+            images: Saved image locations
+            request_id: FAL.ai request ID
+            prompt_used: Prompt sent to the API
+            resolution: Requested resolution
+            aspect_ratio: Requested aspect ratio
+            elapsed: Seconds spent on the item
+            bytes_written: Total bytes of the saved images
+            error: Error message for failed or skipped items
+            skipped: True if the item never started (deadline passed)
+            cached: True if the images were reused from an earlier generation
+            index: Position of the specification in the batch input
+            renditions: Rendition locations per saved image, if produced
+            near_duplicates: Images that matched the perceptual-hash index, if any
+            platform: Social platform (social posts)
+            element_type: Brand element type (brand elements)
+            category: Asset category (custom assets)
+            web_search_enabled: Whether web search was on (custom assets)
+            client: NanobananProClient used to fetch `raw` on demand
+        """
+        self.success = success
+        self.asset_name = asset_name
+        self.images = tuple(images)
+        self.request_id = request_id
+        self.prompt_used = prompt_used
+        # Batches repeat the same handful of values; share one string object
+        self.resolution = sys.intern(resolution) if resolution else resolution
+        self.aspect_ratio = sys.intern(aspect_ratio) if aspect_ratio else aspect_ratio
+        self.elapsed = elapsed
+        self.bytes_written = bytes_written
+        self.error = error
+        self.skipped = skipped
+        self.cached = cached
+        self.index = index
+        self.renditions = renditions
+        self.near_duplicates = near_duplicates
+        self.platform = platform
+        self.element_type = element_type
+        self.category = category
+        self.web_search_enabled = web_search_enabled
+        self._client = client
+        self._raw = None
+
+    @classmethod
+    def from_output(
+        cls,
+        output: Dict[str, Any],
+        asset_name: str,
+        elapsed: float,
+        client: Any = None
+    ) -> "AssetResult":
+        """Build a record from a ClaudeCreativeAssistant result dictionary"""
+        return cls(
+            success=output["success"],
+            asset_name=asset_name,
+            images=output.get("images", ()),
+            request_id=output.get("request_id"),
+            prompt_used=output.get("prompt_used"),
+            resolution=output.get("resolution"),
+            aspect_ratio=output.get("aspect_ratio"),
+            elapsed=elapsed,
+            bytes_written=output.get("bytes_written", 0),
+            error=output.get("error"),
+            cached=output.get("cached", False),
+            renditions=output.get("renditions"),
+            near_duplicates=output.get("near_duplicates"),
+            platform=output.get("platform"),
+            element_type=output.get("element_type"),
+            category=output.get("category"),
+            web_search_enabled=output.get("web_search_enabled"),
+            client=client
+        )
+
+    def copy(self, **changes) -> "AssetResult":
+        """New record with some fields replaced"""
+        fields = {name: getattr(self, name) for name in self._FIELDS}
+        fields.update(changes)
+        return AssetResult(client=self._client, **fields)
+
+    @property
+    def raw(self) -> Optional[Dict[str, Any]]:
+        """Full API payload, fetched by request ID the first time it is read"""
+        if self._raw is None and self.request_id and self._client is not None:
+            self._raw = self._client.get_request_status(self.request_id)
+        return self._raw
+
+    def keys(self) -> Iterator[str]:
+        """Field names that carry a value (unset optional fields are omitted)"""
+        for name in self._FIELDS:
+            value = getattr(self, name)
+            if value is None or (name in ("skipped", "cached") and not value):
+                continue
+            yield name
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.keys():
+            raise KeyError(key)
+        value = getattr(self, key)
+        return list(value) if key == "images" else value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.keys()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dictionary (JSON-serializable) of the set fields"""
+        return {name: self[name] for name in self.keys()}
+
+    def __repr__(self) -> str:
+        state = "ok" if self.success else f"error={self.error!r}"
+        return f"AssetResult({self.asset_name!r}, {state}, images={len(self.images)})"
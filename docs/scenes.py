@@ -0,0 +1,262 @@
+"""
+Scene Assets Module
+Turns a Remotion scene script (as written by the remotion-script-writer
+skill) into per-scene image specifications, generates them concurrently and
+records which files belong to which scene
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Union
+
+from fal_api import ASPECT_RATIOS
+
+# Used when a script leaves out videoMetadata width/height
+DEFAULT_VIDEO_SIZE = (1920, 1080)
+
+
+def nearest_aspect_ratio(width: float, height: float) -> str:
+    """
+    Supported aspect ratio closest to a frame size
+
+    Ratios are compared on a log scale, so 2:1 is as far from 1:1 as 1:2.
+
+    Args:
+        width: Frame width
+        height: Frame height
+
+    Returns:
+        Aspect ratio string, e.g. "16:9"
+    """
+    if width <= 0 or height <= 0:
+        raise ValueError("width and height must be positive")
+    target = math.log(width / height)
+
+    def distance(ratio: str) -> float:
+        w, h = ratio.split(":")
+        return abs(math.log(int(w) / int(h)) - target)
+
+    return min(ASPECT_RATIOS, key=distance)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-") or "video"
+
+
+def _parse_dimensions(value: Any) -> Optional[tuple]:
+    """(width, height) from "800x600", or None"""
+    match = re.fullmatch(r"\s*(\d+)\s*[xX×]\s*(\d+)\s*", str(value or ""))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def _scene_number(value: Any, position: int) -> int:
+    """sceneNumber as an int (scripts sometimes write "1"), else the scene's position"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return position
+
+
+def load_script(script: Union[str, Path, Dict[str, Any]]) -> Dict[str, Any]:
+    """Read a scene script from a JSON file (dictionaries are returned as is)"""
+    if isinstance(script, dict):
+        return script
+    with open(script) as f:
+        return json.load(f)
+
+
+def video_directory(script: Dict[str, Any], category: str = "videos") -> str:
+    """Asset category (relative directory) holding one video's assets"""
+    return f"{category}/{_slug(script.get('videoMetadata', {}).get('title', 'video'))}"
+
+
+def scene_specs(
+    script: Union[str, Path, Dict[str, Any]],
+    resolution: str = "2K",
+    num_variations: int = 1,
+    category: str = "videos"
+) -> List[Dict[str, Any]]:
+    """
+    Batch specifications for every scene of a script
+
+    Each scene gets a background plate at the video's aspect ratio, plus one
+    visual per image element, sized from requiredAssets dimensions when the
+    script lists them. Prompts are built from the scene title, on-screen
+    text, voiceover and branding colors, and ask for no lettering since text
+    is rendered by Remotion.
+
+    Args:
+        script: Scene script dictionary or path to its JSON file
+        resolution: Image resolution for every spec
+        num_variations: Variations per spec
+        category: Top-level asset directory; each video gets a subdirectory
+
+    Returns:
+        "custom" batch specifications (see ClaudeCreativeAssistant.batch_generate)
+        with extra "scene", "role" and "src" keys identifying the slot they fill
+    """
+    script = load_script(script)
+    metadata = script.get("videoMetadata", {})
+    width = metadata.get("width") or DEFAULT_VIDEO_SIZE[0]
+    height = metadata.get("height") or DEFAULT_VIDEO_SIZE[1]
+    video_ratio = nearest_aspect_ratio(width, height)
+    video_dir = video_directory(script, category)
+    video_type = str(metadata.get("videoType", "video")).replace("-", " ")
+
+    branding = script.get("brandingGuidelines", {})
+    palette = ", ".join(
+        f"{name.replace('Color', '')} {branding[name]}"
+        for name in ("primaryColor", "secondaryColor", "accentColor")
+        if branding.get(name)
+    )
+    required = {
+        image.get("path"): image
+        for image in script.get("requiredAssets", {}).get("images", [])
+    }
+
+    specs = []
+    for position, scene in enumerate(script.get("scenes", []), start=1):
+        number = _scene_number(scene.get("sceneNumber"), position)
+        title = scene.get("title", f"Scene {number}")
+        visuals = scene.get("visuals", {})
+        elements = visuals.get("elements", [])
+        voiceover = scene.get("audio", {}).get("voiceover", "")
+        on_screen = "; ".join(
+            element["content"] for element in elements
+            if element.get("type") == "text" and element.get("content")
+        )
+
+        context = f"Scene {number} of a {video_type} for {metadata.get('title', 'a product')}: {title}."
+        if voiceover:
+            context += f" Narration: {voiceover}"
+
+        background_prompt = (
+            f"{context} Background plate for this scene"
+            + (f", dominant color {visuals['background']}" if visuals.get("background") else "")
+            + (f", brand palette {palette}" if palette else "")
+            + (f". On-screen text overlaid later: {on_screen}" if on_screen else "")
+            + ". Clean, uncluttered composition with open space for overlays, "
+            "no text, letters or logos, cinematic quality."
+        )
+        specs.append({
+            "type": "custom",
+            "category": video_dir,
+            "name": f"scene-{number:02d}-background",
+            "prompt": background_prompt,
+            "resolution": resolution,
+            "aspect_ratio": video_ratio,
+            "num_variations": num_variations,
+            "scene": number,
+            "role": "background",
+            "src": None
+        })
+
+        for element in elements:
+            if element.get("type") != "image" or not element.get("src"):
+                continue
+            src = element["src"]
+            listed = required.get(src, {})
+            size = _parse_dimensions(listed.get("dimensions"))
+            description = listed.get("description") or f"Visual for {title}"
+            specs.append({
+                "type": "custom",
+                "category": video_dir,
+                "name": f"scene-{number:02d}-{_slug(Path(src).stem)}",
+                "prompt": (
+                    f"{description}. {context}"
+                    + (f" Brand palette {palette}." if palette else "")
+                    + " Crisp, professional, no placeholder text."
+                ),
+                "resolution": resolution,
+                "aspect_ratio": nearest_aspect_ratio(*size) if size else video_ratio,
+                "num_variations": num_variations,
+                "scene": number,
+                "role": "image",
+                "src": src
+            })
+
+    return specs
+
+
+def _write_json_atomic(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def generate_scene_assets(
+    assistant,
+    script: Union[str, Path, Dict[str, Any]],
+    resolution: str = "2K",
+    num_variations: int = 1,
+    max_workers: Optional[int] = None,
+    deadline=None,
+    category: str = "videos"
+) -> Dict[str, Any]:
+    """
+    Generate every scene's assets concurrently and write a manifest
+
+    Args:
+        assistant: ClaudeCreativeAssistant to generate with (its cache,
+            limiter and storage apply)
+        script: Scene script dictionary or path to its JSON file
+        resolution: Image resolution
+        num_variations: Variations per asset
+        max_workers: Assets generated at once (defaults as in iter_batch_generate)
+        deadline: Seconds from now or a Deadline for the whole video
+        category: Top-level asset directory
+
+    Returns:
+        Manifest dictionary, also saved as manifest.json in the video's
+        directory: "scenes" maps each scene number to its "background" files
+        and "images" ({script src: files}); failed or skipped slots are listed
+        under "errors"
+    """
+    data = load_script(script)
+    metadata = data.get("videoMetadata", {})
+    width = metadata.get("width") or DEFAULT_VIDEO_SIZE[0]
+    height = metadata.get("height") or DEFAULT_VIDEO_SIZE[1]
+    specs = scene_specs(data, resolution=resolution, num_variations=num_variations, category=category)
+
+    plan = assistant.plan_batch(specs, max_workers=max_workers)
+    results = assistant.run_plan(plan, deadline=deadline)
+
+    scenes: Dict[str, Dict[str, Any]] = {}
+    for spec, result in zip(specs, results):
+        entry = scenes.setdefault(str(spec["scene"]), {"background": [], "images": {}, "errors": []})
+        if not result.success:
+            entry["errors"].append({
+                "name": spec["name"],
+                "src": spec["src"],
+                "error": result.error or ("skipped" if result.skipped else "no images generated")
+            })
+        elif spec["role"] == "background":
+            entry["background"] = list(result.images)
+        else:
+            entry["images"][spec["src"]] = list(result.images)
+
+    video_dir = Path(assistant.output_dir) / video_directory(data, category)
+    manifest = {
+        "title": metadata.get("title"),
+        "width": width,
+        "height": height,
+        "aspect_ratio": nearest_aspect_ratio(width, height),
+        "script": None if isinstance(script, dict) else str(script),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "scenes": scenes
+    }
+    _write_json_atomic(video_dir / "manifest.json", manifest)
+    manifest["manifest_path"] = str(video_dir / "manifest.json")
+    return manifest
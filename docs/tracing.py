@@ -0,0 +1,151 @@
+"""
+Tracing Hooks Module
+Lightweight start/end event API for correlating work across the generation pipeline
+"""
+
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List
+
+
+class Span:
+    """A single timed operation with correlation IDs and attributes"""
+
+    __slots__ = (
+        "name", "span_id", "trace_id", "parent_id",
+        "attributes", "start_time", "end_time", "error"
+    )
+
+    def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional["Span"] = None):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Elapsed seconds, or None while the span is still open"""
+        if self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes discovered while the span is running (request IDs, sizes)"""
+        self.attributes.update(attributes)
+
+
+class TraceHook:
+    """
+    Base class for trace subscribers
+
+    Override on_start and/or on_end. Both receive the Span; on_end is called
+    after end_time (and error, if the operation raised) have been filled in.
+    Exceptions raised by hooks are suppressed so a faulty tracer cannot fail
+    a generation.
+    """
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        pass
+
+
+_hooks: List[TraceHook] = []
+_hooks_lock = threading.Lock()
+_current_span: ContextVar[Optional[Span]] = ContextVar("nanobanana_current_span", default=None)
+
+
+def add_hook(hook: TraceHook) -> None:
+    """Register a trace subscriber"""
+    global _hooks
+    with _hooks_lock:
+        # Copy-on-write so span() can read the list without locking
+        _hooks = _hooks + [hook]
+
+
+def remove_hook(hook: TraceHook) -> None:
+    """Unregister a previously added trace subscriber"""
+    global _hooks
+    with _hooks_lock:
+        _hooks = [h for h in _hooks if h is not hook]
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost active span in this context, if any"""
+    return _current_span.get()
+
+
+class _NoopSpanContext:
+    """Shared do-nothing span used when no hook is registered"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpanContext":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpanContext()
+
+
+class _SpanContext:
+    """Context manager that opens a Span and notifies hooks"""
+
+    __slots__ = ("_span", "_hooks", "_token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any], hooks: List[TraceHook]):
+        self._span = Span(name, attributes, _current_span.get())
+        self._hooks = hooks
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._span)
+        for hook in self._hooks:
+            try:
+                hook.on_start(self._span)
+            except Exception:
+                pass
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._span.end_time = time.time()
+        if exc is not None:
+            self._span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        for hook in self._hooks:
+            try:
+                hook.on_end(self._span)
+            except Exception:
+                pass
+        return False
+
+
+def span(name: str, **attributes: Any):
+    """
+    Open a traced span
+
+    Args:
+        name: Operation name (e.g. "client.generate_image")
+        **attributes: Initial attributes recorded on the span
+
+    Returns:
+        Context manager yielding the Span. When no hook is registered a
+        shared no-op object is returned instead, so untraced runs pay only
+        for a list truthiness check.
+    """
+    hooks = _hooks
+    if not hooks:
+        return _NOOP
+    return _SpanContext(name, attributes, hooks)
@@ -0,0 +1,155 @@
+"""
+HTTP Transport Module
+Optional HTTP/2 session for NanobananProClient, built on httpx, that
+multiplexes concurrent status polls and downloads over a few connections per
+host while presenting the small part of the requests API the client uses
+"""
+
+import json
+from typing import Optional, Dict, Any, Iterator
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # Only needed when the HTTP/2 transport is enabled
+    httpx = None
+
+
+def http2_available() -> bool:
+    """True if httpx and its HTTP/2 support (h2) are installed"""
+    if httpx is None:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _translate(error: Exception, response: Optional["Http2Response"] = None) -> requests.exceptions.RequestException:
+    """Map an httpx exception onto the requests exception callers already handle"""
+    message = str(error) or type(error).__name__
+    if isinstance(error, httpx.TimeoutException):
+        if isinstance(error, httpx.ConnectTimeout):
+            return requests.exceptions.ConnectTimeout(message)
+        return requests.exceptions.ReadTimeout(message)
+    if isinstance(error, httpx.TransportError):
+        return requests.exceptions.ConnectionError(message)
+    return requests.exceptions.RequestException(message, response=response)
+
+
+class Http2Response:
+    """requests.Response look-alike wrapping an httpx response"""
+
+    def __init__(self, response, streaming: bool = False):
+        self._response = response
+        self._streaming = streaming
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.http_version = response.http_version
+
+    @property
+    def content(self) -> bytes:
+        try:
+            return self._response.read()
+        except httpx.HTTPError as e:
+            raise _translate(e, self)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self._response.encoding or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        try:
+            return json.loads(self.content)
+        except json.JSONDecodeError as e:
+            # Same exception requests.Response.json raises
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos, response=self)
+
+    def raise_for_status(self) -> None:
+        if 400 <= self.status_code < 600:
+            kind = "Client" if self.status_code < 500 else "Server"
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {kind} Error: {self._response.reason_phrase} for url: {self.url}",
+                response=self
+            )
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        try:
+            if self._streaming:
+                yield from self._response.iter_bytes(chunk_size)
+            else:
+                content = self._response.content
+                for start in range(0, len(content), chunk_size):
+                    yield content[start:start + chunk_size]
+        except httpx.HTTPError as e:
+            raise _translate(e, self)
+
+    def close(self) -> None:
+        self._response.close()
+
+    def __enter__(self) -> "Http2Response":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
+
+
+class Http2Session:
+    """
+    Drop-in replacement for the client's requests.Session
+
+    Requests to an HTTPS origin that supports HTTP/2 share one multiplexed
+    connection (more are opened only when the server's stream limit is
+    reached); origins without HTTP/2 (negotiated via ALPN), and plain http://
+    URLs, are served over pooled HTTP/1.1 connections. Responses and
+    exceptions are translated to their requests equivalents, so the
+    client's error handling is unchanged. Safe to share between threads.
+    """
+
+    def __init__(self, pool_size: int = 32):
+        """
+        Initialize the session
+
+        Args:
+            pool_size: Maximum connections kept open across all hosts
+        """
+        if not http2_available():
+            raise RuntimeError(
+                "httpx with HTTP/2 support is required for the HTTP/2 transport. "
+                "Install it with: pip install 'httpx[http2]'"
+            )
+        self.client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            follow_redirects=True
+        )
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        json: Any = None,
+        timeout: Optional[float] = None,
+        stream: bool = False
+    ) -> Http2Response:
+        try:
+            request = self.client.build_request(
+                method, url, headers=headers, json=json, timeout=httpx.Timeout(timeout)
+            )
+            return Http2Response(self.client.send(request, stream=stream), streaming=stream)
+        except httpx.HTTPError as e:
+            raise _translate(e)
+
+    def get(self, url: str, **kwargs) -> Http2Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> Http2Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,283 @@
+"""
+Asset Watcher Module
+Keeps per-category asset counts and byte totals current in memory, using
+inotify (through ctypes, Linux) with a polling fallback, so asset summaries
+are answered without walking the output directory
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+
+# Same rules as a full scan in ClaudeCreativeAssistant.get_asset_summary
+ASSET_SUFFIXES = (".png", ".jpeg", ".webp")
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+)
+_EVENT = struct.Struct("iIII")
+
+
+def _load_inotify():
+    """libc handle with inotify symbols, or None where unavailable"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class AssetIndex:
+    """
+    Live per-category asset counts and byte totals for an output directory
+
+    After one initial scan, changes arrive as inotify events on every asset
+    directory, or from a background rescan every poll_interval seconds when
+    inotify is unavailable (non-Linux, watch limit reached). Writes made
+    through this process's storage can be reported with notify_write() so
+    they show up immediately, before the watcher sees them. Deletions made
+    outside the process are picked up either way.
+    """
+
+    def __init__(self, root: str, poll_interval: float = 2.0, use_inotify: bool = True):
+        """
+        Start watching a directory
+
+        Args:
+            root: Output directory to summarize
+            poll_interval: Seconds between rescans in polling mode
+            use_inotify: Try inotify before falling back to polling
+        """
+        self.root = Path(os.path.abspath(root))
+        self.poll_interval = poll_interval
+
+        self._files: Dict[str, Tuple[str, int]] = {}  # path -> (category, size)
+        self._counts: Dict[str, int] = {}
+        self._bytes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._libc = _load_inotify() if use_inotify else None
+        self._fd = -1
+        self._watches: Dict[int, Path] = {}
+        if self._libc is not None:
+            self._fd = self._libc.inotify_init1(_IN_CLOEXEC)
+
+        self.mode = "inotify" if self._fd >= 0 else "polling"
+        self._rescan()
+
+        self._thread = threading.Thread(
+            target=self._watch_loop if self._fd >= 0 else self._poll_loop,
+            name="asset-watcher",
+            daemon=True
+        )
+        self._thread.start()
+
+    # -- bookkeeping -----------------------------------------------------
+
+    def _classify(self, path: Path) -> Optional[str]:
+        """Category of a countable asset file, or None"""
+        try:
+            relative = path.relative_to(self.root)
+        except ValueError:
+            return None
+        parts = relative.parts
+        if len(parts) < 2 or parts[0].startswith(".") or path.name.startswith("."):
+            return None
+        if path.suffix not in ASSET_SUFFIXES or path.parent.name == "renditions":
+            return None
+        return parts[0]
+
+    def _set(self, path: str, category: str, size: int) -> None:
+        old = self._files.get(path)
+        if old is not None:
+            self._bytes[old[0]] -= old[1]
+            self._counts[old[0]] -= 1
+        self._files[path] = (category, size)
+        self._counts[category] = self._counts.get(category, 0) + 1
+        self._bytes[category] = self._bytes.get(category, 0) + size
+
+    def _discard(self, path: str) -> None:
+        old = self._files.pop(path, None)
+        if old is not None:
+            self._counts[old[0]] -= 1
+            self._bytes[old[0]] -= old[1]
+
+    def _discard_tree(self, directory: str) -> None:
+        prefix = directory.rstrip(os.sep) + os.sep
+        for path in [p for p in self._files if p.startswith(prefix)]:
+            self._discard(path)
+
+    def _scan(self, directory: Path) -> Dict[str, Tuple[str, int]]:
+        """Walk a directory, adding inotify watches along the way"""
+        found = {}
+        for current, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d != "renditions"]
+            if self._fd >= 0:
+                self._add_watch(Path(current))
+            for name in files:
+                path = Path(current) / name
+                category = self._classify(path)
+                if category is not None:
+                    try:
+                        found[str(path)] = (category, path.stat().st_size)
+                    except FileNotFoundError:
+                        pass
+        return found
+
+    def _rescan(self) -> None:
+        found = self._scan(self.root) if self.root.exists() else {}
+        with self._lock:
+            self._files.clear()
+            self._counts.clear()
+            self._bytes.clear()
+            for path, (category, size) in found.items():
+                self._set(path, category, size)
+
+    def notify_write(self, location: str) -> None:
+        """
+        Record a file this process just wrote
+
+        Args:
+            location: Path returned by the storage backend
+        """
+        path = Path(os.path.abspath(location))
+        category = self._classify(path)
+        if category is None:
+            return
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._set(str(path), category, size)
+
+    # -- watching ----------------------------------------------------------
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            if ctypes.get_errno() == errno.ENOSPC:
+                self.mode = "polling"  # Watch limit reached; the loop switches over
+            return
+        self._watches[wd] = directory
+
+    def _watch_loop(self) -> None:
+        buffer_size = 64 * 1024
+        try:
+            while not self._stop.is_set() and self.mode == "inotify":
+                ready, _, _ = select.select([self._fd], [], [], 1.0)
+                if not ready:
+                    continue
+                data = os.read(self._fd, buffer_size)
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                    name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                    offset += _EVENT.size + length
+                    self._handle(wd, mask, os.fsdecode(name))
+        except OSError:
+            self.mode = "polling"
+        finally:
+            os.close(self._fd)
+            self._fd = -1
+
+        if not self._stop.is_set():
+            self._rescan()
+            self._poll_loop()
+
+    def _handle(self, wd: int, mask: int, name: str) -> None:
+        if mask & _IN_Q_OVERFLOW:
+            self._rescan()
+            return
+        if mask & _IN_IGNORED:
+            self._watches.pop(wd, None)
+            return
+
+        directory = self._watches.get(wd)
+        if directory is None:
+            return
+        if mask & _IN_DELETE_SELF:
+            with self._lock:
+                self._discard_tree(str(directory))
+            return
+
+        path = directory / name
+        if mask & _IN_ISDIR:
+            if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                with self._lock:
+                    self._discard_tree(str(path))
+            elif mask & (_IN_CREATE | _IN_MOVED_TO) and not name.startswith(".") and name != "renditions":
+                # Files may land before the watch exists, so scan what is already there
+                found = self._scan(path)
+                with self._lock:
+                    for file_path, (category, size) in found.items():
+                        self._set(file_path, category, size)
+            return
+
+        category = self._classify(path)
+        if category is None:
+            return
+        if mask & (_IN_DELETE | _IN_MOVED_FROM):
+            with self._lock:
+                self._discard(str(path))
+        else:
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                return
+            with self._lock:
+                self._set(str(path), category, size)
+
+    def _poll_loop(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self._rescan()
+
+    # -- queries -----------------------------------------------------------
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Current totals
+
+        Returns:
+            Dictionary in the get_asset_summary format plus byte totals
+        """
+        with self._lock:
+            by_category = {category: count for category, count in self._counts.items() if count > 0}
+            bytes_by_category = {category: self._bytes[category] for category in by_category}
+        return {
+            "total_assets": sum(by_category.values()),
+            "by_category": by_category,
+            "total_bytes": sum(bytes_by_category.values()),
+            "bytes_by_category": bytes_by_category,
+            "asset_dir": str(self.root)
+        }
+
+    def close(self) -> None:
+        """Stop watching"""
+        self._stop.set()
+        self._thread.join(timeout=2.0)